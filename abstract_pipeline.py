@@ -0,0 +1,598 @@
+"""Shared abstract-enrichment engine behind fetch_abstracts.py and fetch_opportunities_abstracts.py
+
+Each input file is described by an AbstractSchema (how to read its rows, how to build an output
+row from a match, how to save). Rows from every schema in a run are grouped by (title, PI, FY),
+each key is resolved once, and the result fans out to every output row that shares it. A key
+resolves through the bulk project-number search if any of its rows carries a number.
+
+    python abstract_pipeline.py                 # targets.csv and opportunities.csv in one run
+    python abstract_pipeline.py opportunities   # a single schema
+"""
+import requests
+import argparse
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from functools import lru_cache, partial
+
+from reporter_api import search_projects, add_api_arguments, configure_api_from_args, replay_output
+from title_index import calculate_title_similarity
+from pi_index import calculate_pi_match_score, name_tokens, normalize_name
+from abstract_runner import run_concurrently, add_runner_arguments
+from checkpoint import Checkpoint, checkpoint_filename, checkpoint_key
+from grant_store import add_store_arguments, upsert_from_args
+from columnar import output_filename, add_format_arguments
+
+PROJECT_NUM_CHUNK_SIZE = 100
+PI_BATCH_SIZE = 50  # PI names packed into one pi_names search
+PI_BATCH_PAGE_SIZE = 500
+
+ABSTRACT_FIELDS = [
+    "ProjectTitle", "AbstractText", "PrincipalInvestigators", 
+    "FiscalYear", "ProjectNum", "ActivityCode", "OrgName"
+]
+
+ORG_FY_ACTIVITY_CODES = ["R01", "R37", "R35", "U01", "U24", "P01", "P30", "P50"]
+
+# Combined score at which a raced strategy wins outright (1.0 = exact title and PI)
+RACE_CONFIDENT_SCORE = 1.0
+# Strategies a race keeps in flight; the rest start only while no confident match has arrived
+RACE_WIDTH = 2
+
+class SearchIncomplete(requests.exceptions.RequestException):
+    """No strategy matched, but some could not run, so the target is not definitively missing"""
+
+def fetch_abstract_by_title(project_title, pi_name="", fiscal_year="", race=False, confident_score=RACE_CONFIDENT_SCORE,
+                            pi_planner=None):
+    """Fetch project abstract using NIH Reporter API by searching project title"""
+    fields = ABSTRACT_FIELDS
+    
+    # Try multiple search strategies based on API documentation
+    search_strategies = []
+    
+    # Strategy 1: Advanced text search on project title
+    if project_title.strip():
+        search_strategies.append({
+            "criteria": {
+                "advanced_text_search": {
+                    "operator": "and",
+                    "search_field": "projecttitle",
+                    "search_text": project_title.strip()
+                },
+                "org_names": ["MAYO"],
+                "include_active_projects": True
+            },
+            "description": "Advanced text search on title + Mayo"
+        })
+    
+    # Strategy 2: Search by PI name with wildcard (API supports this)
+    # With a planner, the search is shared with every other target in the same fiscal year
+    pi_names_list = parse_pi_names(pi_name)
+    if pi_names_list and pi_planner is not None:
+        search_strategies.append({
+            "candidates": lambda: pi_planner.candidates(pi_name, fiscal_year),
+            "description": "PI names + Mayo Clinic (batched)"
+        })
+    elif pi_names_list:
+        strategy_criteria = {
+            "pi_names": pi_names_list,
+            "org_names": ["MAYO"],
+            "include_active_projects": True
+        }
+        
+        if fiscal_year and fiscal_year.isdigit():
+            strategy_criteria["fiscal_years"] = [int(fiscal_year)]
+        
+        search_strategies.append({
+            "criteria": strategy_criteria,
+            "description": f"PI names + Mayo Clinic"
+        })
+    
+    # Strategy 3: Text search with key terms from title
+    if project_title.strip():
+        # Extract key terms (longer words, remove common words)
+        title_words = [word for word in project_title.split() 
+                      if len(word) > 3 and word.lower() not in 
+                      ['with', 'using', 'from', 'for', 'and', 'the', 'that', 'this', 'will', 'been', 'have']]
+        
+        if len(title_words) >= 2:
+            key_terms = " ".join(title_words[:5])  # Use first 5 key terms
+            search_strategies.append({
+                "criteria": {
+                    "advanced_text_search": {
+                        "operator": "and",
+                        "search_field": "projecttitle,abstracttext",
+                        "search_text": key_terms
+                    },
+                    "org_names": ["MAYO"],
+                    "include_active_projects": True
+                },
+                "description": f"Key terms search: {key_terms[:50]}..."
+            })
+    
+    # Strategy 4: Organization + fiscal year + activity codes (for recent grants)
+    # The candidate list is shared by every target in the same fiscal year, so it is
+    # fetched once per run and scored locally
+    if fiscal_year and fiscal_year.isdigit():
+        search_strategies.append({
+            "candidates": lambda: fetch_org_fy_candidates(int(fiscal_year)),
+            "description": f"Mayo + FY{fiscal_year} + activity codes"
+        })
+    
+    if race and len(search_strategies) > 1:
+        return race_strategies(search_strategies, fields, project_title, pi_name, confident_score)
+    
+    failures = 0
+    for strategy in search_strategies:
+        try:
+            best_match = run_strategy(strategy, fields, project_title, pi_name)
+        except requests.exceptions.RequestException as e:
+            print(f"    API request failed with {strategy['description']}: {e}")
+            failures += 1
+            continue
+        
+        if best_match:
+            print(f"    Found via {strategy['description']} (score: {best_match['score']:.2f})")
+            return best_match
+    
+    if failures:
+        raise SearchIncomplete(f"{failures} of {len(search_strategies)} search strategies failed")
+    return None
+
+def parse_pi_names(pi_name):
+    """pi_names search criteria for a semicolon-separated PI string"""
+    pi_names_list = []
+    for name in (pi_name or "").split(";"):
+        name_parts = name.split()
+        if len(name_parts) >= 2:
+            pi_names_list.append({"first_name": name_parts[0], "last_name": name_parts[-1]})
+        elif len(name_parts) == 1:
+            pi_names_list.append({"any_name": name_parts[0]})
+    return pi_names_list
+
+def pi_key(first, last):
+    """(normalized last name, first-name tokens) for comparing PIs across spellings"""
+    identity = normalize_name(f"{first} {last}")
+    return (identity[0] if identity else ""), name_tokens(first)
+
+def first_names_agree(wanted, found):
+    """First-name tokens agree up to the shorter list, with an initial matching its full name"""
+    for a, b in zip(wanted, found):
+        if a != b and not ((len(a) == 1 or len(b) == 1) and a[0] == b[0]):
+            return False
+    return True
+
+def project_has_pi(project, pi_names_list):
+    """Whether a project lists one of these PIs, i.e. would be returned by their pi_names search
+
+    Names are compared on normalized identities rather than exact strings, so "K Nair" finds
+    first name "K Sreekumaran" and "Jennifer Sauver" finds last name "St Sauver".
+    """
+    found = [pi_key(pi.get("first_name") or "", pi.get("last_name") or "")
+             for pi in project.get("principal_investigators") or []]
+    for wanted in pi_names_list:
+        if "any_name" in wanted:
+            token = name_tokens(wanted["any_name"])
+            if token and any(token[0] == last or token[0] in first for last, first in found):
+                return True
+            continue
+        last, first = pi_key(wanted["first_name"], wanted["last_name"])
+        if any(last == found_last and first_names_agree(first, found_first) for found_last, found_first in found):
+            return True
+    return False
+
+class PIBatchPlanner:
+    """Packs the PI-name searches of many targets into a few chunked queries per fiscal year
+
+    Each fiscal year's distinct PI names are split into chunks of batch_size, and a chunk is
+    fetched the first time any target needs it. A target's candidates are the projects in its
+    chunks that list one of its PIs, i.e. what its own pi_names search would have returned.
+    """
+
+    def __init__(self, targets, batch_size=PI_BATCH_SIZE):
+        """targets are (PI string, fiscal year) pairs"""
+        names_by_year = {}
+        for pi_name, fiscal_year in targets:
+            year = fiscal_year if fiscal_year and fiscal_year.isdigit() else ""
+            names = names_by_year.setdefault(year, {})
+            for wanted in parse_pi_names(pi_name):
+                names.setdefault(json.dumps(wanted, sort_keys=True), wanted)
+
+        self.batches = []  # [criteria, lock, projects once fetched]
+        self.batch_of = {}  # (fiscal year, PI name key) -> batch index
+        for year, names in names_by_year.items():
+            keys = list(names)
+            for start in range(0, len(keys), batch_size):
+                chunk = keys[start:start + batch_size]
+                criteria = {
+                    "pi_names": [names[key] for key in chunk],
+                    "org_names": ["MAYO"],
+                    "include_active_projects": True
+                }
+                if year:
+                    criteria["fiscal_years"] = [int(year)]
+                for key in chunk:
+                    self.batch_of[(year, key)] = len(self.batches)
+                self.batches.append([criteria, threading.Lock(), None])
+
+    def __len__(self):
+        return len(self.batches)
+
+    def candidates(self, pi_name, fiscal_year):
+        """Projects matching a target's PI names, from the batches that cover them"""
+        year = fiscal_year if fiscal_year and fiscal_year.isdigit() else ""
+        pi_names_list = parse_pi_names(pi_name)
+        indices = sorted({self.batch_of[(year, json.dumps(wanted, sort_keys=True))] for wanted in pi_names_list})
+
+        projects = []
+        for index in indices:
+            projects.extend(project for project in self.fetch(index) if project_has_pi(project, pi_names_list))
+        return projects
+
+    def fetch(self, index):
+        """Every page of one batch, fetched once and shared by all of its targets"""
+        batch = self.batches[index]
+        with batch[1]:
+            if batch[2] is None:
+                projects = []
+                offset = 0
+                while True:
+                    data = search_projects({
+                        "criteria": batch[0],
+                        "include_fields": ABSTRACT_FIELDS,
+                        "offset": offset,
+                        "limit": PI_BATCH_PAGE_SIZE
+                    })
+                    page = data.get("results") or []
+                    projects.extend(page)
+                    offset += len(page)
+                    if len(page) < PI_BATCH_PAGE_SIZE or offset >= data.get("meta", {}).get("total", offset):
+                        break
+                batch[2] = projects
+            return batch[2]
+
+def run_strategy(strategy, fields, project_title, pi_name):
+    """Run one search strategy and return its best match above threshold, if any"""
+    if "candidates" in strategy:
+        projects = strategy["candidates"]()
+    else:
+        payload = {
+            "criteria": strategy["criteria"],
+            "include_fields": fields,
+            "offset": 0,
+            "limit": 100,
+            "use_relevance": True  # Use relevance scoring for better matches
+        }
+        
+        data = search_projects(payload)
+        projects = data.get("results") or []
+    
+    if not projects:
+        return None
+    
+    return find_best_match(projects, project_title, pi_name)
+
+def race_strategies(search_strategies, fields, project_title, pi_name, confident_score=RACE_CONFIDENT_SCORE,
+                    width=RACE_WIDTH):
+    """Run strategies width at a time in priority order; take the first confident match, else the best overall
+
+    A strategy is only started after an earlier one has finished without a confident match, so
+    a confident result stops the race before the remaining strategies spend any requests.
+    """
+    executor = ThreadPoolExecutor(max_workers=width)
+    backlog = deque(search_strategies)
+    running = {}
+    
+    def fill():
+        while backlog and len(running) < width:
+            strategy = backlog.popleft()
+            running[executor.submit(run_strategy, strategy, fields, project_title, pi_name)] = strategy
+    
+    best_match = None
+    best_strategy = None
+    failures = 0
+    try:
+        fill()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                strategy = running.pop(future)
+                try:
+                    match = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"    API request failed with {strategy['description']}: {e}")
+                    failures += 1
+                    continue
+                
+                if match and (best_match is None or match["score"] > best_match["score"]):
+                    best_match = match
+                    best_strategy = strategy
+            
+            if best_match and best_match["score"] >= confident_score:
+                break
+            fill()
+    finally:
+        # A strategy still in flight finishes in the background; queued ones never start
+        executor.shutdown(wait=False)
+    
+    if best_match:
+        print(f"    Found via {best_strategy['description']} (score: {best_match['score']:.2f}, raced)")
+    elif failures:
+        raise SearchIncomplete(f"{failures} of {len(search_strategies)} search strategies failed")
+    return best_match
+
+def find_best_match(projects, project_title, pi_name):
+    """Score candidate projects against a target and return the best match above threshold"""
+    best_match = None
+    best_score = 0.0
+    
+    for project in projects:
+        match = project_to_match(project, 0.0)
+        
+        # Calculate match score
+        title_similarity = calculate_title_similarity(project_title, match["title"])
+        pi_match_score = calculate_pi_match_score(pi_name, match["pi_names"])
+        
+        # Combined score with weights
+        combined_score = (title_similarity * 0.7) + (pi_match_score * 0.3)
+        
+        if combined_score > best_score and combined_score > 0.3:  # Minimum threshold
+            best_score = combined_score
+            match["score"] = combined_score
+            best_match = match
+    
+    return best_match
+
+@lru_cache(maxsize=None)
+def fetch_org_fy_candidates(fiscal_year):
+    """Fetch the shared Mayo + fiscal year + activity code candidate list once per run"""
+    payload = {
+        "criteria": {
+            "org_names": ["MAYO CLINIC ROCHESTER"],
+            "fiscal_years": [fiscal_year],
+            "activity_codes": ORG_FY_ACTIVITY_CODES,
+            "include_active_projects": True
+        },
+        "include_fields": ABSTRACT_FIELDS,
+        "offset": 0,
+        "limit": 100,
+        "use_relevance": True
+    }
+    
+    data = search_projects(payload)
+    return tuple(data.get("results") or [])
+
+def project_to_match(project, score):
+    """Build the abstract result dict returned by the fetchers from an API project"""
+    project_pi_names = []
+    for pi in project.get("principal_investigators", []):
+        first = pi.get("first_name", "").strip()
+        last = pi.get("last_name", "").strip()
+        if first or last:
+            project_pi_names.append(f"{first} {last}".strip())
+    
+    return {
+        "title": project.get("project_title", ""),
+        "abstract": project.get("abstract_text", ""),
+        "pi_names": "; ".join(project_pi_names),
+        "fiscal_year": project.get("fiscal_year", ""),
+        "project_num": project.get("full_project_num", ""),
+        "activity": project.get("activity_code", ""),
+        "org_name": project.get("organization", {}).get("name", ""),
+        "score": score
+    }
+
+def fetch_abstracts_by_project_nums(project_nums, chunk_size=PROJECT_NUM_CHUNK_SIZE):
+    """Fetch abstracts for known project numbers using chunked multi-value searches"""
+    unique_nums = list(dict.fromkeys(num.strip().upper() for num in project_nums if num and num.strip()))
+    resolved = {}
+    if not unique_nums:
+        return resolved
+    
+    print(f"Resolving {len(unique_nums)} known project numbers in batches of {chunk_size}...")
+    
+    for start in range(0, len(unique_nums), chunk_size):
+        chunk = set(unique_nums[start:start + chunk_size])
+        payload = {
+            "criteria": {"project_nums": sorted(chunk)},
+            "include_fields": ABSTRACT_FIELDS,
+            "offset": 0,
+            "limit": 500
+        }
+        
+        try:
+            data = search_projects(payload)
+        except requests.exceptions.RequestException as e:
+            print(f"  API request failed for project number batch: {e}")
+            continue
+        
+        for project in data.get("results") or []:
+            project_num = project.get("full_project_num", "").upper()
+            if project_num in chunk and project.get("abstract_text"):
+                resolved[project_num] = project_to_match(project, 1.0)
+    
+    print(f"✓ Resolved {len(resolved)}/{len(unique_nums)} project numbers directly")
+    print()
+    return resolved
+
+class AbstractSchema:
+    """One input file and the output it is enriched into
+
+    read(filename) returns GrantRecord targets; build_row(target, result) makes the output
+    record; save(records, filename, output_format) writes them.
+    """
+
+    def __init__(self, name, input_file, output_file, read, build_row, save):
+        self.name = name
+        self.input_file = input_file
+        self.output_file = output_file
+        self.read = read
+        self.build_row = build_row
+        self.save = save
+
+def target_key(target):
+    """Rows with the same title, PI and fiscal year share one lookup"""
+    return checkpoint_key(target.project_title, target.pi_names, target.fy_text)
+
+def add_abstract_arguments(parser):
+    """Add the API, store, format, runner and matching switches shared by the abstract fetchers"""
+    add_api_arguments(parser)
+    add_store_arguments(parser)
+    add_format_arguments(parser)
+    add_runner_arguments(parser)
+    parser.add_argument("--race", action="store_true",
+                        help=f"Run search strategies {RACE_WIDTH} at a time and stop at the first confident match")
+    parser.add_argument("--confidence", type=float, default=RACE_CONFIDENT_SCORE,
+                        help=f"Score that ends a race early (default: {RACE_CONFIDENT_SCORE})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted run from its checkpoint journal")
+    parser.add_argument("--local", action="store_true",
+                        help="Match against a bulk-downloaded Mayo corpus instead of per-row searches")
+
+def run_abstract_schemas(schemas, args):
+    """Resolve every unique (title, PI, FY) key across the schemas' inputs once and write each output
+
+    Returns {schema name: (output rows, output filename)}.
+    """
+    inputs = []
+    groups = {}  # key -> (first target, project numbers seen for it)
+    for schema in schemas:
+        targets = schema.read(schema.input_file)
+        inputs.append((schema, targets))
+        for target in targets:
+            key = target_key(target)
+            if key not in groups:
+                groups[key] = (target, [])
+            if target.full_project_num:
+                groups[key][1].append(target.full_project_num.upper())
+
+    total_rows = sum(len(targets) for _, targets in inputs)
+    if not total_rows:
+        print("No targets found to process")
+        return {}
+
+    print(f"Found {total_rows} rows to fetch abstracts for, {len(groups)} unique (title, PI, FY) keys...")
+    print()
+
+    # Every resolved key is journaled as soon as it is fetched; --resume skips keys already in
+    # the journal and the final outputs are assembled from it plus this run's results
+    journal = replay_output(schemas[0].output_file if len(schemas) == 1 else "abstracts")
+    checkpoint = Checkpoint(checkpoint_filename(journal))
+    journaled = checkpoint.load() if args.resume else checkpoint.reset()
+
+    pending = [key for key in groups if key not in journaled]
+    if journaled:
+        print(f"Resuming: {len(groups) - len(pending)} keys already resolved, {len(pending)} remaining")
+        print()
+
+    # Keys that already carry a project number are resolved in bulk; the title search
+    # cascade only runs for whatever is left over
+    project_nums = [num for key in pending for num in groups[key][1]]
+
+    if args.local:
+        from mayo_corpus import load_or_download_corpus
+        fiscal_years = [groups[key][0].fiscal_year for key in pending if isinstance(groups[key][0].fiscal_year, int)]
+        corpus = load_or_download_corpus(fiscal_years, refresh=args.refresh)
+        resolved = corpus.resolve_project_nums(project_nums)
+        resolve = corpus.match
+        print()
+    else:
+        resolved = fetch_abstracts_by_project_nums(project_nums)
+        # PI-name searches for the keys left over are packed into a few queries per fiscal year
+        unresolved = [groups[key][0] for key in pending if not any(num in resolved for num in groups[key][1])]
+        pi_planner = PIBatchPlanner((target.pi_names, target.fy_text) for target in unresolved)
+        if len(pi_planner):
+            print(f"Planned {len(pi_planner)} batched PI-name searches for {len(unresolved)} remaining keys")
+            print()
+        resolve = partial(fetch_abstract_by_title, race=args.race, confident_score=args.confidence, pi_planner=pi_planner)
+
+    # Only definitive outcomes are journaled: a match, or no match after every strategy ran.
+    # Keys whose searches hit request errors stay out of the journal so --resume retries them.
+    incomplete = set()
+
+    def fetch(key):
+        target, nums = groups[key]
+        result = next((resolved[num] for num in nums if num in resolved), None)
+        if not result:
+            try:
+                result = resolve(target.project_title, target.pi_names, target.fy_text)
+            except requests.exceptions.RequestException as e:
+                print(f"    Search incomplete, will retry on --resume: {e}")
+                incomplete.add(key)
+                return None
+
+        checkpoint.append(key, result)
+        return result
+
+    def report(done, key, result):
+        if result and result.get("abstract"):
+            status = f"✓ Found abstract ({len(result['abstract'])} characters)"
+        elif key in incomplete:
+            status = "✗ Search incomplete"
+        else:
+            status = "✗ Abstract not found"
+        print(f"[{done}/{len(pending)}] {status}: {groups[key][0].project_title[:60]}...")
+
+    # Keys are processed concurrently; outputs are built in input order afterwards
+    results = checkpoint.load()
+    results.update(zip(pending, run_concurrently(pending, fetch, args.concurrency, on_done=report)))
+
+    outputs = {}
+    for schema, targets in inputs:
+        rows = [schema.build_row(target, results[target_key(target)]) for target in targets]
+        successful = sum(1 for row in rows if row.fetch_status == "SUCCESS")
+
+        print()
+        print(f"{schema.input_file} summary: {successful} successful, {len(rows) - successful} failed")
+        if rows:
+            print(f"Success rate: {successful/len(rows)*100:.1f}%")
+
+        output = replay_output(output_filename(schema.output_file, args.format))
+        schema.save(rows, output, args.format)
+        upsert_from_args(args, rows)
+        outputs[schema.name] = (rows, output)
+
+    if incomplete:
+        print(f"\n✗ {len(incomplete)} targets hit request errors and were saved as NOT_FOUND; "
+              f"run again with --resume to retry only those")
+    else:
+        checkpoint.remove()
+
+    return outputs
+
+def load_schemas():
+    """Schemas of the abstract fetch scripts, by name"""
+    # Imported here because both scripts build on this module
+    from fetch_abstracts import TARGETS_SCHEMA
+    from fetch_opportunities_abstracts import OPPORTUNITIES_SCHEMA
+    return {schema.name: schema for schema in (TARGETS_SCHEMA, OPPORTUNITIES_SCHEMA)}
+
+def main():
+    """Main function"""
+    schemas = load_schemas()
+    parser = argparse.ArgumentParser(description="Fetch abstracts for several input files in one run")
+    parser.add_argument("schemas", nargs="*", metavar="SCHEMA",
+                        help=f"Inputs to process: {', '.join(schemas)} (default: all)")
+    add_abstract_arguments(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.schemas if name not in schemas]
+    if unknown:
+        parser.error(f"unknown schema {', '.join(unknown)}; choose from {', '.join(schemas)}")
+    configure_api_from_args(args)
+
+    print("NIH Grant Abstract Pipeline")
+    print("=" * 40)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+
+    selected = [schemas[name] for name in dict.fromkeys(args.schemas or schemas)]
+    outputs = run_abstract_schemas(selected, args)
+
+    for rows, output in outputs.values():
+        if any(row.fetch_status == "SUCCESS" for row in rows):
+            print(f"\nSuccess! Abstracts saved to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = 8
+
+async def run_async(items, worker, concurrency=DEFAULT_CONCURRENCY, on_done=None):
+    """Run worker over items with at most `concurrency` in flight, returning results in input order
+
+    worker is a blocking function; it runs on a thread pool so the shared HTTP session and
+    rate limiter in reporter_api still govern how fast requests actually go out.
+    on_done(completed, item, result) is called as each item finishes, in completion order.
+    """
+    concurrency = max(1, concurrency)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(items)
+    completed = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run_one(index, item):
+            nonlocal completed
+            async with semaphore:
+                results[index] = await loop.run_in_executor(executor, worker, item)
+            completed += 1
+            if on_done:
+                on_done(completed, item, results[index])
+
+        await asyncio.gather(*(run_one(index, item) for index, item in enumerate(items)))
+
+    return results
+
+def run_concurrently(items, worker, concurrency=DEFAULT_CONCURRENCY, on_done=None):
+    """Synchronous entry point for run_async"""
+    return asyncio.run(run_async(list(items), worker, concurrency, on_done))
+
+def add_runner_arguments(parser):
+    """Add the shared concurrency switch to a script's argument parser"""
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Targets to process at once (default: {DEFAULT_CONCURRENCY})")
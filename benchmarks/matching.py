@@ -0,0 +1,398 @@
+"""Micro-benchmarks for the matching, filtering and dedup hot paths
+
+    python -m benchmarks.matching                    # compare against benchmarks/baseline.json
+    python -m benchmarks.matching --rows 1000000     # larger synthetic inputs
+    python -m benchmarks.matching --update-baseline  # record new reference numbers
+
+Every benchmark reports operations per second and peak traced memory. The run fails if a
+benchmark is slower or larger than the stored baseline by more than --tolerance, or if match
+accuracy on the golden set (perturbed targets.csv queries against the labelled projects in
+mayo_grants.csv) drops. The memoized title, PI, date and cost parsers are cleared before every
+timed run, so the numbers are for the uncached path, and hiring_mask is checked against the
+row-wise timing filter.
+"""
+import argparse
+import contextlib
+import csv
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import grant_record
+import hiring_timing
+import pi_index
+import title_index
+from title_index import calculate_title_similarity, normalize_title
+from pi_index import calculate_pi_match_score
+from grant_record import GrantRecord
+from fetch_grants import process_projects, deduplicate_projects, analyze_results
+from hiring_timing import timing_columns, hiring_mask, timing_reasons
+from benchmarks.mock_reporter import generate_projects, TITLE_WORDS, FIRST_NAMES, LAST_NAMES
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_ROWS = 20000
+DEFAULT_TOLERANCE = 0.25
+
+# Synthetic data generators; all are lazy so they scale to millions of rows
+
+def iter_titles(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield " ".join(rng.sample(TITLE_WORDS, rng.randint(4, 10))).capitalize()
+
+def iter_title_pairs(count, seed=0):
+    """Pairs of titles where about half are near-duplicates"""
+    rng = random.Random(seed)
+    titles = iter_titles(count, seed)
+    for title in titles:
+        if rng.random() < 0.5:
+            words = title.split()
+            other = " ".join(words[:-1] + [rng.choice(TITLE_WORDS)])
+        else:
+            other = " ".join(rng.sample(TITLE_WORDS, rng.randint(4, 10)))
+        yield title, other
+
+def iter_pi_pairs(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        target = "; ".join(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 2)))
+        project = "; ".join(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 3)))
+        yield target, project
+
+def iter_api_projects(count, seed=0):
+    """Raw API-shaped projects, generated in chunks to keep generator memory flat"""
+    chunk = 10000
+    for start in range(0, count, chunk):
+        yield from generate_projects(min(chunk, count - start), seed=seed + start)
+
+def iter_processed_rows(count, seed=0, duplicate_rate=0.3):
+    """Records like process_projects output, with projects repeated across fiscal years"""
+    rng = random.Random(seed)
+    today = date.today()
+    projects = []
+    for i in range(count):
+        if projects and rng.random() < duplicate_rate:
+            title, serial = rng.choice(projects)
+        else:
+            title, serial = f"{' '.join(rng.sample(TITLE_WORDS, 6))} {i}", i
+            if len(projects) < 100000:
+                projects.append((title, serial))
+        start = today - timedelta(days=rng.randint(30, 3000))
+        yield GrantRecord.from_csv_row({
+            "PI_NAMEs": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "ORG_NAME": "MAYO CLINIC ROCHESTER", "ORG_CITY": "ROCHESTER", "ORG_STATE": "MN",
+            "PROJECT_TITLE": title, "PHR": "", "NIH_SPENDING_CATS": "",
+            "FY": str(rng.choice([2022, 2023, 2024, 2025])),
+            "SUPPORT_YEAR": str(rng.randint(1, 10)),
+            "PROJECT_START": f"{start.isoformat()}T00:00:00",
+            "PROJECT_END": f"{(start + timedelta(days=1825)).isoformat()}T00:00:00",
+            "TOTAL_COST": str(rng.randint(50000, 3000000)),
+            "ACTIVITY": rng.choice(["R01", "R01", "U01", "P30", "P50", "R35"]),
+            "APPLICATION_TYPE": "5",
+            "FULL_PROJECT_NUM": f"5R01CA{serial:06d}-{rng.randint(1, 10):02d}",
+        })
+
+# Row-wise timing filter that hiring_timing.py replaced; kept as the reference its batch
+# results are checked against and as the baseline for the hiring_mask speedup
+
+def is_hiring_relevant(project, today=None):
+    """
+    Check if grant has optimal timing for hiring:
+    - 1.5+ years remaining OR started within last year
+    """
+    try:
+        today = today or datetime.now()
+        project_start_str = project.get("project_start_date", "")
+        project_end_str = project.get("project_end_date", "")
+        
+        if not project_end_str:
+            fy = project.get("fiscal_year", "")
+            return fy in [2024, 2025]
+        
+        project_end = datetime.strptime(project_end_str[:10], '%Y-%m-%d')
+        years_remaining = (project_end - today).days / 365.25
+        
+        if years_remaining >= 1.5:
+            return True
+        
+        if project_start_str:
+            project_start = datetime.strptime(project_start_str[:10], '%Y-%m-%d')
+            years_since_start = (today - project_start).days / 365.25
+            if years_since_start <= 1.0:
+                return True
+        
+        return False
+        
+    except (ValueError, TypeError):
+        fy = project.get("fiscal_year", "")
+        return fy in [2024, 2025]
+
+def get_timing_reason(project, today=None):
+    """Get reason why project passed timing filter"""
+    try:
+        today = today or datetime.now()
+        project_end_str = project.get("project_end_date", "")
+        project_start_str = project.get("project_start_date", "")
+        
+        if project_end_str:
+            project_end = datetime.strptime(project_end_str[:10], '%Y-%m-%d')
+            years_remaining = (project_end - today).days / 365.25
+            if years_remaining >= 1.5:
+                return f"{years_remaining:.1f}y remaining"
+        
+        if project_start_str:
+            project_start = datetime.strptime(project_start_str[:10], '%Y-%m-%d')
+            years_since_start = (today - project_start).days / 365.25
+            if years_since_start <= 1.0:
+                return f"Started {years_since_start:.1f}y ago"
+        
+        return "Recent FY"
+    except (ValueError, TypeError):
+        return "Recent FY"
+
+def timing_mismatches(rows, seed=0):
+    """Projects where hiring_mask or timing_reasons disagree with the row-wise reference"""
+    projects = list(iter_api_projects(rows, seed))
+    now = datetime.now()
+    columns = timing_columns(projects, now)
+    mask = [bool(relevant) for relevant in hiring_mask(columns)]
+    passed = [i for i, relevant in enumerate(mask) if relevant]
+    reasons = dict(zip(passed, timing_reasons(columns, passed)))
+
+    mismatches = 0
+    for i, project in enumerate(projects):
+        if mask[i] != is_hiring_relevant(project, now) or (mask[i] and reasons[i] != get_timing_reason(project, now)):
+            mismatches += 1
+    return mismatches
+
+# Benchmarks: each returns (operation count, function to time) for a given row count
+
+def bench_title_similarity(rows):
+    pairs = list(iter_title_pairs(rows))
+    return len(pairs), lambda: [calculate_title_similarity(a, b) for a, b in pairs]
+
+def bench_pi_match_score(rows):
+    pairs = list(iter_pi_pairs(rows))
+    return len(pairs), lambda: [calculate_pi_match_score(a, b) for a, b in pairs]
+
+def bench_is_hiring_relevant(rows):
+    projects = list(iter_api_projects(rows))
+    return len(projects), lambda: [is_hiring_relevant(project) for project in projects]
+
+def bench_hiring_mask(rows):
+    projects = list(iter_api_projects(rows))
+    return len(projects), lambda: hiring_mask(timing_columns(projects))
+
+def bench_process_projects(rows):
+    projects = list(iter_api_projects(rows))
+    return len(projects), lambda: process_projects(projects)
+
+def bench_deduplicate(rows):
+    processed = list(iter_processed_rows(rows))
+    return len(processed), lambda: deduplicate_projects(processed)
+
+def bench_analyze_results(rows):
+    processed = list(iter_processed_rows(rows))
+    return len(processed), lambda: analyze_results(processed)
+
+BENCHMARKS = {
+    "calculate_title_similarity": bench_title_similarity,
+    "calculate_pi_match_score": bench_pi_match_score,
+    "is_hiring_relevant": bench_is_hiring_relevant,
+    "hiring_mask": bench_hiring_mask,
+    "process_projects": bench_process_projects,
+    "deduplicate_projects": bench_deduplicate,
+    "analyze_results": bench_analyze_results,
+}
+
+# Memoized parsers on the hot paths; cleared before every timed run so repeats measure the
+# uncached path instead of cache hits left over from the previous run
+PARSE_CACHES = [
+    title_index.normalize_title,
+    pi_index.normalize_name, pi_index.parse_pi_string, pi_index.pi_lookup,
+    grant_record.parse_date_text,
+    hiring_timing.parse_day, hiring_timing.parse_cost,
+]
+
+def clear_caches():
+    for cache in PARSE_CACHES:
+        cache.cache_clear()
+
+def measure(setup, rows, repeat):
+    """Best-of-repeat ops/sec, then peak memory from a separate traced run, all from cold caches"""
+    operations, run = setup(rows)
+    quiet = open(os.devnull, "w")
+
+    best = float("inf")
+    with contextlib.redirect_stdout(quiet):
+        for _ in range(repeat):
+            clear_caches()
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+
+        clear_caches()
+        gc.collect()
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    quiet.close()
+
+    return {"rows": operations, "ops_per_sec": operations / best if best > 0 else 0.0, "peak_bytes": peak}
+
+# Golden set: targets.csv labelled against project_abstracts.csv
+
+def read_csv(filename):
+    with open(filename, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+# Rewordings a resubmission or a hand-typed target list tends to introduce
+RETITLE_WORDS = {
+    "using": "with", "and": "&", "assessment": "evaluation", "imaging": "images", "study": "analysis",
+    "methods": "approaches", "detection": "identification", "diagnosis": "diagnosing",
+}
+
+def retitle(words, rng):
+    """Reword a title the way renewals and typed target lists drift"""
+    words = [RETITLE_WORDS.get(word.lower(), word) if rng.random() < 0.5 else word for word in words]
+    return [word.strip(":,.") for word in words]
+
+def golden_pis(pis):
+    """The first PI as listed, as "Last, First", and with a middle initial added to the first name"""
+    first_pi = pis.split(";")[0].strip().split()
+    if len(first_pi) < 2:
+        return [pis]
+    first, last = first_pi[0], " ".join(first_pi[1:])
+    return [pis, f"{last}, {first}", f"{first} {chr(ord('A') + len(last) % 26)} {last}"]
+
+def golden_queries(targets, seed=0):
+    """Textually perturbed variants of each target, labelled with the title it must resolve to
+
+    No query title normalizes to its labelled title, so an exact-string lookup scores nothing.
+    """
+    rng = random.Random(seed)
+    for target in targets:
+        title, pis = target["PROJECT_TITLE"], target["PI_NAMEs"]
+        words = title.split()
+        variants = [
+            " ".join(words[:-1]),
+            " ".join(words[1:]),
+            " ".join(retitle(words, rng)),
+            " ".join(w for w in words if rng.random() > 0.2),
+            " ".join(retitle(words[:-1], rng)),
+        ]
+        for index, variant in enumerate(variants):
+            if variant and normalize_title(variant)[0] != normalize_title(title)[0]:
+                pi_variants = golden_pis(pis)
+                yield variant, pi_variants[index % len(pi_variants)], title
+
+def golden_accuracy(targets_file="targets.csv", abstracts_file="project_abstracts.csv", pool_file="mayo_grants.csv"):
+    """Fraction of golden queries whose best combined score picks the labelled project
+
+    Candidates are the fetched grants in pool_file, which hold the labelled projects among
+    every other Mayo grant; targets without a labelled project in the pool are left out.
+    """
+    if not os.path.exists(pool_file):
+        return {"queries": 0, "correct": 0, "accuracy": 0.0}
+
+    pool = [(row["PROJECT_TITLE"], row["PI_NAMEs"]) for row in read_csv(pool_file)]
+    pool_titles = {normalize_title(title)[0] for title, _ in pool}
+    labelled_titles = {
+        normalize_title(row["PROJECT_TITLE"])[0] for row in read_csv(abstracts_file) if row.get("FETCH_STATUS") == "SUCCESS"
+    } & pool_titles
+    targets = [row for row in read_csv(targets_file) if normalize_title(row["PROJECT_TITLE"])[0] in labelled_titles]
+
+    correct = total = 0
+    for title, pis, expected in golden_queries(targets):
+        best, best_score = None, 0.0
+        for candidate_title, candidate_pis in pool:
+            score = calculate_title_similarity(title, candidate_title) * 0.7 + calculate_pi_match_score(pis, candidate_pis) * 0.3
+            if score > best_score and score > 0.3:
+                best, best_score = candidate_title, score
+        total += 1
+        correct += best is not None and normalize_title(best)[0] == normalize_title(expected)[0]
+
+    return {"queries": total, "correct": correct, "accuracy": correct / total if total else 0.0}
+
+def load_baseline(filename=BASELINE_FILE):
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def compare(name, result, baseline, tolerance):
+    """Return a list of regression messages for one benchmark"""
+    if not baseline or name not in baseline.get("benchmarks", {}):
+        return []
+    reference = baseline["benchmarks"][name]
+    problems = []
+    if result["ops_per_sec"] < reference["ops_per_sec"] * (1 - tolerance):
+        problems.append(f"{name}: {result['ops_per_sec']:,.0f} ops/s vs baseline {reference['ops_per_sec']:,.0f}")
+    # Peak memory scales with rows, so compare per row
+    if result["peak_bytes"] / result["rows"] > reference["peak_bytes"] / reference["rows"] * (1 + tolerance):
+        problems.append(f"{name}: {result['peak_bytes'] / result['rows']:,.0f} B/row vs baseline "
+                        f"{reference['peak_bytes'] / reference['rows']:,.0f}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark matching, filtering and dedup hot paths")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Synthetic rows per benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark; the best is kept")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown / memory growth before a benchmark counts as a regression")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    problems = []
+
+    print(f"Micro-benchmarks ({args.rows:,d} rows, best of {args.repeat})")
+    print("=" * 72)
+    for name in args.only or BENCHMARKS:
+        result = measure(BENCHMARKS[name], args.rows, args.repeat)
+        results[name] = result
+        reference = (baseline or {}).get("benchmarks", {}).get(name)
+        change = f"{result['ops_per_sec'] / reference['ops_per_sec'] - 1:+6.1%}" if reference else "   new"
+        print(f"{name:<30s} {result['ops_per_sec']:>14,.0f} ops/s {change}  "
+              f"{result['peak_bytes'] / 1024 / 1024:8.1f} MiB peak")
+        problems.extend(compare(name, result, baseline, args.tolerance))
+
+    mismatches = timing_mismatches(args.rows)
+    print(f"\nBatch timing filter vs row-wise reference: {mismatches} mismatches in {args.rows:,d} projects")
+    if mismatches:
+        problems.append(f"hiring_mask / timing_reasons disagree with is_hiring_relevant on {mismatches} projects")
+
+    accuracy = golden_accuracy()
+    print(f"Golden set accuracy: {accuracy['correct']}/{accuracy['queries']} ({accuracy['accuracy']:.1%})")
+    if baseline and accuracy["accuracy"] < baseline.get("golden", {}).get("accuracy", 0.0):
+        problems.append(f"golden accuracy {accuracy['accuracy']:.1%} below baseline {baseline['golden']['accuracy']:.1%}")
+
+    if args.update_baseline:
+        merged = dict((baseline or {}).get("benchmarks", {}), **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "benchmarks": merged, "golden": accuracy}, f, indent=2)
+        print(f"\n✓ Saved baseline to {args.baseline}")
+        return
+
+    if problems:
+        print("\nRegressions:")
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        sys.exit(1)
+
+    if baseline:
+        print("\n✓ No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""Local stand-in for the NIH RePORTER /v2/projects/search endpoint
+
+Serves synthetic or recorded projects, honors the criteria, offset, limit and include_fields
+the scripts send, and can inject latency, 429s and 5xx errors.
+
+    python -m benchmarks.mock_reporter --projects 10000 --port 8765
+    REPORTER_API_BASE=http://127.0.0.1:8765 python fetch_grants.py --no-cache
+"""
+import argparse
+import fnmatch
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_LIMIT = 500
+OFFSET_CEILING = 15000
+
+# include_fields names mapped to the response keys they populate
+FIELD_KEYS = {
+    "ProjectTitle": ["project_title"],
+    "AbstractText": ["abstract_text"],
+    "PublicHealthRelevance": ["phr"],
+    "PrincipalInvestigators": ["principal_investigators"],
+    "FiscalYear": ["fiscal_year"],
+    "SupportYear": ["support_year"],
+    "ProjectNum": ["project_num", "full_project_num", "core_project_num"],
+    "ActivityCode": ["activity_code"],
+    "ApplicationTypeCode": ["application_type_code"],
+    "ProjectStartDate": ["project_start_date"],
+    "ProjectEndDate": ["project_end_date"],
+    "AwardAmount": ["award_amount"],
+    "SpendingCategories": ["spending_categories"],
+    "DateAdded": ["date_added"],
+    "OrgName": ["organization"],
+    "OrgCity": ["organization"],
+    "OrgState": ["organization"],
+}
+
+ACTIVITY_CODES = [
+    "R01", "R01", "R01", "R01", "R21", "R35", "R37", "RF1", "R00", "K08", "K23", "F31",
+    "P01", "P30", "P50", "U01", "U19", "U54", "UF1", "RC2", "UH3", "U24", "U10", "UL1"
+]
+INSTITUTES = ["CA", "HL", "DK", "NS", "AG", "AI", "EB", "GM", "MH", "AR"]
+ORGANIZATIONS = [
+    ("MAYO CLINIC ROCHESTER", "ROCHESTER", "MN"),
+    ("MAYO CLINIC ARIZONA", "SCOTTSDALE", "AZ"),
+    ("MAYO CLINIC JACKSONVILLE", "JACKSONVILLE", "FL"),
+]
+FIRST_NAMES = ["Ann", "Hugo", "Gregory", "Maria", "Wei", "Li", "Priya", "John", "Sara", "Ahmed", "Elena", "Kenji"]
+LAST_NAMES = ["Smith", "Botha", "Worrell", "Garcia", "Zhang", "Li", "Patel", "Williams", "Nguyen", "Haddad",
+              "Rossi", "Tanaka", "Johnson", "Kim", "Larsen", "Okafor"]
+TITLE_WORDS = [
+    "deep", "learning", "imaging", "genomic", "cardiac", "neural", "signals", "kidney", "tumor",
+    "immune", "aging", "dementia", "prediction", "biomarkers", "population", "cohort", "single-cell",
+    "proteomics", "metabolomics", "seizure", "speech", "MRI", "CT", "ultrasound", "microbiome",
+    "clinical", "trial", "network", "modeling", "therapy", "resistance", "inflammation", "vascular",
+    "myeloma", "lymphoma", "liver", "lung", "bone", "repair", "regeneration", "wearable", "sensors"
+]
+CONNECTORS = ["for", "of", "in", "with", "using", "and", "to"]
+
+def generate_projects(count, seed=0):
+    """Generate synthetic projects shaped like RePORTER search results"""
+    rng = random.Random(seed)
+    projects = []
+    today = date.today()
+
+    for i in range(count):
+        activity = rng.choice(ACTIVITY_CODES)
+        institute = rng.choice(INSTITUTES)
+        fiscal_year = rng.choice([2021, 2022, 2023, 2024, 2025])
+        support_year = rng.randint(1, 12)
+        start = today - timedelta(days=rng.randint(30, 365 * 10))
+        end = start + timedelta(days=rng.randint(365 * 2, 365 * 7))
+        org_name, org_city, org_state = ORGANIZATIONS[0] if rng.random() < 0.8 else rng.choice(ORGANIZATIONS)
+        core = f"{activity}{institute}{100000 + i:06d}"
+        full = f"{rng.choice([1, 2, 5])}{core}-{support_year:02d}"
+
+        words = rng.sample(TITLE_WORDS, rng.randint(4, 9))
+        for _ in range(rng.randint(1, 3)):
+            words.insert(rng.randint(1, len(words) - 1), rng.choice(CONNECTORS))
+        title = " ".join(words).capitalize()
+
+        pis = [
+            {"first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES)}
+            for _ in range(rng.choice([1, 1, 1, 2, 3]))
+        ]
+
+        projects.append({
+            "project_title": title,
+            "abstract_text": f"PROJECT SUMMARY\n{title}. " + " ".join(rng.choices(TITLE_WORDS, k=120)),
+            "phr": f"This project studies {' '.join(words[:4])}.",
+            "principal_investigators": pis,
+            "fiscal_year": fiscal_year,
+            "support_year": support_year,
+            "project_num": full,
+            "full_project_num": full,
+            "core_project_num": core,
+            "activity_code": activity,
+            "application_type_code": int(full[0]),
+            "project_start_date": f"{start.isoformat()}T00:00:00",
+            "project_end_date": f"{end.isoformat()}T00:00:00",
+            "award_amount": rng.randint(50000, 3000000),
+            "spending_categories": [{"name": rng.choice(["Bioengineering", "Cancer", "Neurosciences", "Aging"])}],
+            "date_added": f"{(start + timedelta(days=rng.randint(0, 300))).isoformat()}T00:00:00",
+            "organization": {"name": org_name, "city": org_city, "state": org_state},
+        })
+
+    return projects
+
+def load_fixture(filename):
+    """Load recorded projects from a JSON list, a saved API response, or a corpus file"""
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data.get("results") or data.get("projects") or []
+    return data
+
+def in_date_range(value, date_range):
+    value = (value or "")[:10]
+    if not value:
+        return False
+    if date_range.get("from_date") and value < date_range["from_date"][:10]:
+        return False
+    if date_range.get("to_date") and value > date_range["to_date"][:10]:
+        return False
+    return True
+
+def matches_pi(project, pi_filters):
+    for pi in project.get("principal_investigators", []):
+        first = pi.get("first_name", "").upper()
+        last = pi.get("last_name", "").upper()
+        for wanted in pi_filters:
+            if "any_name" in wanted:
+                name = wanted["any_name"].upper()
+                if name in (first, last):
+                    return True
+                continue
+            if wanted.get("last_name", "").upper() != last:
+                continue
+            if not wanted.get("first_name") or wanted["first_name"].upper() == first:
+                return True
+    return False
+
+def matches_text(project, search):
+    fields = [field.strip() for field in search.get("search_field", "projecttitle").split(",")]
+    text = " ".join(
+        project.get({"projecttitle": "project_title", "abstracttext": "abstract_text", "terms": "phr"}.get(field, ""), "")
+        for field in fields
+    ).lower()
+    words = text.split()
+    terms = search.get("search_text", "").lower().split()
+    if not terms:
+        return True
+    hits = [term in words or term in text for term in terms]
+    return any(hits) if search.get("operator", "and").lower() == "or" else all(hits)
+
+def matches(project, criteria):
+    """Apply the subset of RePORTER criteria the scripts use"""
+    org = project.get("organization", {}).get("name", "").upper()
+    if criteria.get("org_names_exact_match") and org not in [name.upper() for name in criteria["org_names_exact_match"]]:
+        return False
+    if criteria.get("org_names") and not any(name.upper() in org for name in criteria["org_names"]):
+        return False
+    if criteria.get("fiscal_years") and project.get("fiscal_year") not in criteria["fiscal_years"]:
+        return False
+    if criteria.get("activity_codes") and project.get("activity_code") not in criteria["activity_codes"]:
+        return False
+    if criteria.get("project_nums"):
+        num = project.get("full_project_num", "").upper()
+        core = project.get("core_project_num", "").upper()
+        if not any(fnmatch.fnmatch(num, wanted.upper()) or core == wanted.upper() for wanted in criteria["project_nums"]):
+            return False
+    if criteria.get("pi_names") and not matches_pi(project, criteria["pi_names"]):
+        return False
+    if criteria.get("advanced_text_search") and not matches_text(project, criteria["advanced_text_search"]):
+        return False
+    if criteria.get("date_added") and not in_date_range(project.get("date_added"), criteria["date_added"]):
+        return False
+    if criteria.get("project_start_date") and not in_date_range(project.get("project_start_date"), criteria["project_start_date"]):
+        return False
+    return True
+
+def select_fields(project, include_fields):
+    if not include_fields:
+        return project
+    keys = {key for field in include_fields for key in FIELD_KEYS.get(field, [])}
+    return {key: project[key] for key in keys if key in project}
+
+class MockReporter:
+    """Threaded HTTP server serving /v2/projects/search from an in-memory project list"""
+
+    def __init__(self, projects, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 throttle_rate=0.0, error_rate=0.0, retry_after=1, seed=0):
+        self.projects = projects
+        self.by_fiscal_year = {}
+        for project in projects:
+            self.by_fiscal_year.setdefault(project.get("fiscal_year"), []).append(project)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.reset_stats()
+
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": 0, "served": 0, "throttled": 0, "errors": 0, "rows": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def search(self, payload):
+        """Return (status, body) for a search payload"""
+        criteria = payload.get("criteria", {})
+        offset = int(payload.get("offset", 0))
+        limit = int(payload.get("limit", 50))
+        if limit > MAX_LIMIT or offset >= OFFSET_CEILING or offset < 0:
+            return 400, {"error": f"offset must be below {OFFSET_CEILING} and limit at most {MAX_LIMIT}"}
+
+        if criteria.get("fiscal_years"):
+            pool = [p for fy in criteria["fiscal_years"] for p in self.by_fiscal_year.get(fy, [])]
+        else:
+            pool = self.projects
+        results = [project for project in pool if matches(project, criteria)]
+
+        if payload.get("sort_field") == "FiscalYear":
+            results.sort(key=lambda project: project.get("fiscal_year", 0), reverse=payload.get("sort_order") == "desc")
+
+        page = [select_fields(project, payload.get("include_fields")) for project in results[offset:offset + limit]]
+        self.count("rows", len(page))
+        return 200, {"meta": {"total": len(results), "offset": offset, "limit": limit}, "results": page}
+
+    def handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data, compresslevel=1)
+                    headers = dict(headers or {}, **{"Content-Encoding": "gzip"})
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/stats":
+                    self.send_json(200, mock.stats)
+                else:
+                    self.send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                mock.count("requests")
+
+                if mock.latency or mock.jitter:
+                    time.sleep(mock.latency + mock.rng.uniform(0, mock.jitter))
+
+                with mock.lock:
+                    roll = mock.rng.random()
+                if roll < mock.throttle_rate:
+                    mock.count("throttled")
+                    self.send_json(429, {"error": "rate limited"}, {"Retry-After": str(mock.retry_after)})
+                    return
+                if roll < mock.throttle_rate + mock.error_rate:
+                    mock.count("errors")
+                    self.send_json(503, {"error": "service unavailable"})
+                    return
+
+                if self.path.rstrip("/") != "/v2/projects/search":
+                    self.send_json(404, {"error": "not found"})
+                    return
+
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_json(400, {"error": "invalid JSON"})
+                    return
+
+                status, response = mock.search(payload)
+                if status == 200:
+                    mock.count("served")
+                self.send_json(status, response)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock NIH RePORTER search API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--projects", type=int, default=10000, help="Number of synthetic projects")
+    parser.add_argument("--fixture", help="Serve projects from a recorded JSON file instead")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    projects = load_fixture(args.fixture) if args.fixture else generate_projects(args.projects, args.seed)
+    mock = MockReporter(projects, port=args.port, latency=args.latency, jitter=args.jitter,
+                        throttle_rate=args.throttle_rate, error_rate=args.error_rate, seed=args.seed)
+    print(f"Serving {len(projects)} projects at {mock.url}/v2/projects/search")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+if __name__ == "__main__":
+    main()
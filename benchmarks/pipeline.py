@@ -0,0 +1,156 @@
+"""End-to-end throughput benchmark for the three fetch scripts against the mock RePORTER server
+
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --scales 100 10000 --latency 0.05 --throttle-rate 0.02
+
+Each script's main() runs unchanged in a scratch directory, pointed at a local MockReporter,
+and the harness reports wall time, requests issued and rows per second for every scale.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import reporter_api
+import fetch_grants
+import abstract_pipeline
+import fetch_abstracts
+import fetch_opportunities_abstracts
+from benchmarks.mock_reporter import MockReporter, generate_projects
+
+DEFAULT_SCALES = [100, 10000, 100000]
+DEFAULT_TARGETS = 100
+
+def pi_string(project):
+    return "; ".join(f"{pi['first_name']} {pi['last_name']}" for pi in project["principal_investigators"])
+
+def write_inputs(projects, directory, target_count, seed=0):
+    """Write targets.csv and opportunities.csv sampled from the synthetic projects"""
+    rng = random.Random(seed)
+    mayo = [p for p in projects if p["organization"]["name"] == "MAYO CLINIC ROCHESTER"]
+    sample = rng.sample(mayo, min(target_count, len(mayo)))
+
+    with open(os.path.join(directory, "targets.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["PI_NAMEs", "PROJECT_TITLE", "FY", "PROJECT_START", "PROJECT_END", "TOTAL_COST", "ACTIVITY"])
+        for project in sample:
+            # Drop a word so most targets need fuzzy matching rather than an exact title hit
+            words = project["project_title"].split()
+            title = " ".join(words[:-1]) if rng.random() < 0.7 and len(words) > 3 else project["project_title"]
+            writer.writerow([pi_string(project), title, project["fiscal_year"], project["project_start_date"],
+                             project["project_end_date"], project["award_amount"], project["activity_code"]])
+
+    with open(os.path.join(directory, "opportunities.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["PI_NAMEs", "ORG_NAME", "ORG_CITY", "ORG_STATE", "PROJECT_TITLE", "PHR", "NIH_SPENDING_CATS",
+                         "FY", "SUPPORT_YEAR", "PROJECT_START", "PROJECT_END", "TOTAL_COST", "ACTIVITY",
+                         "APPLICATION_TYPE", "FULL_PROJECT_NUM", "Relevance", "Reasoning"])
+        for i, project in enumerate(sample):
+            # Half of the opportunities carry a project number, like the real opportunities.csv
+            project_num = project["full_project_num"] if i % 2 == 0 else ""
+            writer.writerow([pi_string(project), "MAYO CLINIC ROCHESTER", "ROCHESTER", "MN", project["project_title"],
+                             project["phr"], "", project["fiscal_year"], project["support_year"],
+                             project["project_start_date"], project["project_end_date"], project["award_amount"],
+                             project["activity_code"], project["application_type_code"], project_num, "High", ""])
+
+    return len(sample)
+
+def count_csv_rows(filename):
+    if not os.path.exists(filename):
+        return 0
+    with open(filename, "r", encoding="utf-8") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+def run_script(module, argv, mock, directory):
+    """Run a script's main() quietly in directory and return its measurements"""
+    mock.reset_stats()
+    abstract_pipeline.fetch_org_fy_candidates.cache_clear()
+
+    saved_argv, saved_cwd = sys.argv, os.getcwd()
+    sys.argv = [module.__name__] + argv
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            module.main()
+            elapsed = time.perf_counter() - start
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+
+    stats = dict(mock.stats)
+    return {"seconds": elapsed, **stats}
+
+def benchmark_scale(scale, args):
+    projects = generate_projects(scale, seed=args.seed)
+    mock = MockReporter(projects, latency=args.latency, jitter=args.jitter,
+                        throttle_rate=args.throttle_rate, error_rate=args.error_rate, retry_after=0, seed=args.seed)
+
+    results = []
+    with mock, tempfile.TemporaryDirectory() as directory:
+        reporter_api.API_BASE = mock.url
+        target_count = write_inputs(projects, directory, args.targets, seed=args.seed)
+        argv = ["--no-cache", "--rate", str(args.rate)]
+
+        runs = [
+            ("fetch_grants", fetch_grants, argv, "mayo_grants.csv"),
+            ("fetch_abstracts", fetch_abstracts, argv + ["--concurrency", str(args.concurrency)], "project_abstracts.csv"),
+            ("fetch_opportunities_abstracts", fetch_opportunities_abstracts,
+             argv + ["--concurrency", str(args.concurrency)], "opportunities_with_abstracts.csv"),
+        ]
+        for name, module, script_argv, output in runs:
+            measured = run_script(module, script_argv, mock, directory)
+            measured.update(
+                script=name,
+                scale=scale,
+                inputs=target_count if name != "fetch_grants" else scale,
+                output_rows=count_csv_rows(os.path.join(directory, output)),
+            )
+            measured["rows_per_second"] = measured["rows"] / measured["seconds"] if measured["seconds"] else 0.0
+            results.append(measured)
+            print_result(measured)
+
+    return results
+
+def print_result(result):
+    print(f"{result['scale']:>8,d}  {result['script']:<30s} {result['seconds']:8.2f}s "
+          f"{result['requests']:7d} req {result['throttled'] + result['errors']:5d} retried "
+          f"{result['rows']:9,d} rows {result['rows_per_second']:11,.0f} rows/s {result['output_rows']:7,d} out")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch pipeline against a mock RePORTER server")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Synthetic project counts to benchmark")
+    parser.add_argument("--targets", type=int, default=DEFAULT_TARGETS,
+                        help="Rows in the generated targets.csv / opportunities.csv")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Client request rate limit (0 = unlimited, to measure pipeline overhead)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock server latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write results as JSON to this file")
+    args = parser.parse_args()
+
+    print("Benchmarking fetch scripts against the mock RePORTER server")
+    print("=" * 110)
+
+    results = []
+    for scale in args.scales:
+        results.extend(benchmark_scale(scale, args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Saved results to {args.output}")
+
+if __name__ == "__main__":
+    main()
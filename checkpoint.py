@@ -0,0 +1,57 @@
+"""Append-only journal that lets interrupted abstract runs resume
+
+Each resolved key is appended to <output>.checkpoint.jsonl as soon as it is fetched. --resume
+loads the journal and skips those keys; the journal is removed once the outputs are written.
+"""
+import json
+import os
+import threading
+
+def checkpoint_filename(output_file):
+    """Journal file that backs a given output file"""
+    return f"{output_file}.checkpoint.jsonl"
+
+def checkpoint_key(*parts):
+    """Stable key identifying an input row in the journal"""
+    return json.dumps([str(part).strip() for part in parts])
+
+class Checkpoint:
+    """Append-only JSONL journal of resolved rows, so interrupted runs can resume"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Return {key: row} for every complete entry in the journal"""
+        rows = {}
+        if not os.path.exists(self.filename):
+            return rows
+
+        with open(self.filename, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-write leaves a partial last line; that row is simply redone
+                    continue
+                rows[entry["key"]] = entry["row"]
+        return rows
+
+    def append(self, key, row):
+        """Durably record a resolved row as soon as it is available"""
+        line = json.dumps({"key": key, "row": row}) + "\n"
+        with self.lock:
+            with open(self.filename, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reset(self):
+        """Start a fresh journal"""
+        self.remove()
+        return {}
+
+    def remove(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
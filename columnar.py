@@ -0,0 +1,149 @@
+"""Parquet output and column-pruned reading for grant and abstract datasets
+
+    python columnar.py opportunities_with_abstracts.csv          # convert a CSV to Parquet
+    python columnar.py mayo_grants.parquet --columns FY ACTIVITY TOTAL_COST
+
+Parquet needs pyarrow (`uv run --with requests --with pyarrow ...`); CSV output does not.
+"""
+import argparse
+import csv
+import os
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATS = ("csv", "parquet")
+COMPRESSION = "zstd"
+
+# Typed columns; every other field is stored as a string
+INTEGER_FIELDS = {"FY": "int32", "FISCAL_YEAR": "int32", "SUPPORT_YEAR": "int32", "TOTAL_COST": "int64"}
+DATE_FIELDS = {"PROJECT_START", "PROJECT_END"}
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet support needs pyarrow: uv run --with requests --with pyarrow ...")
+
+def output_filename(filename, output_format):
+    """mayo_grants.csv -> mayo_grants.parquet for Parquet output"""
+    if output_format == "parquet":
+        return os.path.splitext(filename)[0] + ".parquet"
+    return filename
+
+def field_type(field):
+    if field in INTEGER_FIELDS:
+        return getattr(pa, INTEGER_FIELDS[field])()
+    if field in DATE_FIELDS:
+        return pa.date32()
+    return pa.string()
+
+def to_int(value):
+    value = str(value if value is not None else "").strip()
+    return int(value) if value.lstrip("-").isdigit() else None
+
+def to_date(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+def to_text(values):
+    return [None if value is None else str(value) for value in values]
+
+def to_column(field, values):
+    """Parse a column to its typed form; return (values, Arrow type, non-empty cells that did not parse)"""
+    parse = to_int if field in INTEGER_FIELDS else to_date if field in DATE_FIELDS else None
+    if parse is None:
+        return to_text(values), pa.string(), []
+
+    column, unparsed = [], []
+    for value in values:
+        parsed = parse(value)
+        if parsed is None and str(value if value is not None else "").strip():
+            unparsed.append(value)
+        column.append(parsed)
+    return column, field_type(field), unparsed
+
+def write_parquet(rows, fieldnames, filename):
+    """Write CSV-shaped rows to a compressed, typed Parquet file; returns the file written
+
+    A typed column with values that do not parse is stored as text instead, so no cell is lost.
+    """
+    require_pyarrow()
+    columns, types = {}, []
+    for field in fieldnames:
+        values = [row.get(field) for row in rows]
+        column, arrow_type, unparsed = to_column(field, values)
+        if unparsed:
+            print(f"✗ {field}: {len(unparsed)} value(s) are not {arrow_type} (e.g. {unparsed[0]!r}); "
+                  f"storing the column as text")
+            column, arrow_type = to_text(values), pa.string()
+        columns[field] = column
+        types.append((field, arrow_type))
+    table = pa.Table.from_pydict(columns, schema=pa.schema(types))
+
+    filename = output_filename(filename, "parquet")
+    pq.write_table(table, filename, compression=COMPRESSION)
+    return filename
+
+def read_table(filename, columns=None, filters=None):
+    """Load only the requested columns (and matching row groups) as an Arrow table
+
+    filters uses pyarrow's form, e.g. [("FY", ">=", 2024), ("ACTIVITY", "in", ["R01", "U01"])].
+    """
+    require_pyarrow()
+    return pq.read_table(filename, columns=columns, filters=filters)
+
+def read_rows(filename, columns=None):
+    """Read a CSV or Parquet dataset as CSV-style string rows, for code written against the CSVs"""
+    if not filename.endswith(".parquet"):
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        except FileNotFoundError:
+            return []
+        return [{key: row[key] for key in columns} for row in rows] if columns else rows
+
+    if not os.path.exists(filename):
+        return []
+    rows = read_table(filename, columns).to_pylist()
+    for row in rows:
+        for field, value in row.items():
+            if value is None:
+                row[field] = ""
+            elif isinstance(value, date):
+                row[field] = f"{value.isoformat()}T00:00:00"
+            else:
+                row[field] = str(value)
+    return rows
+
+def add_format_arguments(parser):
+    """Add the shared output format switch to a script's argument parser"""
+    parser.add_argument("--format", choices=FORMATS, default="csv",
+                        help="Output format; parquet writes typed, zstd-compressed columns (needs pyarrow)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert CSV outputs to Parquet, or inspect a Parquet file")
+    parser.add_argument("filename")
+    parser.add_argument("--columns", nargs="+", help="Only load these columns")
+    args = parser.parse_args()
+
+    if args.filename.endswith(".csv"):
+        with open(args.filename, "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            fieldnames = reader.fieldnames or []
+        written = write_parquet(rows, fieldnames, args.filename)
+        print(f"✓ Converted {len(rows)} rows: {args.filename} ({os.path.getsize(args.filename):,d} bytes) -> "
+              f"{written} ({os.path.getsize(written):,d} bytes)")
+        return
+
+    table = read_table(args.filename, args.columns)
+    print(table.schema)
+    print(f"\n{table.num_rows} rows")
+
+if __name__ == "__main__":
+    main()
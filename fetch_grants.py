@@ -1,45 +1,159 @@
 import requests
-import json
+import argparse
 import csv
-import time
-from datetime import datetime
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, date, timedelta
 
-def is_hiring_relevant(project):
-    """
-    Check if grant has optimal timing for hiring:
-    - 1.5+ years remaining OR started within last year
+from reporter_api import search_projects, add_api_arguments, configure_api_from_args, replay_output
+from grant_store import add_store_arguments, upsert_from_args, core_project_num
+from columnar import write_parquet, read_rows, output_filename, add_format_arguments
+from hiring_timing import timing_columns, hiring_mask, timing_reasons, grant_aggregates
+from grant_record import GrantRecord, format_value, to_csv_rows
+
+PAGE_SIZE = 500
+MAX_WORKERS = 4
+STATE_FILE = "mayo_grants_state.json"
+INCREMENTAL_OVERLAP_DAYS = 7
+OFFSET_CEILING = 15000  # RePORTER rejects offsets beyond this depth
+SHARD_START_DATES = ("1950-01-01", "2035-12-31")
+GRANT_FIELDS = [
+    "PI_NAMEs", "ORG_NAME", "ORG_CITY", "ORG_STATE",
+    "PROJECT_TITLE", "PHR", "NIH_SPENDING_CATS",
+    "FY", "SUPPORT_YEAR", "PROJECT_START", "PROJECT_END",
+    "TOTAL_COST", "ACTIVITY", "APPLICATION_TYPE", "FULL_PROJECT_NUM"
+]
+
+def fetch_page(payload, offset):
+    """Fetch a single page of search results at the given offset"""
+    return search_projects(dict(payload, offset=offset))
+
+def split_shard(criteria):
+    """Split search criteria by fiscal year, then activity code, then project start date"""
+    fiscal_years = criteria.get("fiscal_years") or []
+    if len(fiscal_years) > 1:
+        return [dict(criteria, fiscal_years=[fy]) for fy in fiscal_years]
+    
+    activity_codes = criteria.get("activity_codes") or []
+    if len(activity_codes) > 1:
+        return [dict(criteria, activity_codes=[code]) for code in activity_codes]
+    
+    # Single (FY, activity) shards that are still too large are bisected by start date.
+    # Projects without a start date cannot be reached this way.
+    date_range = criteria.get("project_start_date") or {
+        "from_date": SHARD_START_DATES[0], "to_date": SHARD_START_DATES[1]
+    }
+    start = date.fromisoformat(date_range["from_date"])
+    end = date.fromisoformat(date_range["to_date"])
+    if end <= start:
+        return []
+    
+    middle = start + (end - start) / 2
+    return [
+        dict(criteria, project_start_date={"from_date": start.isoformat(), "to_date": middle.isoformat()}),
+        dict(criteria, project_start_date={"from_date": (middle + timedelta(days=1)).isoformat(), "to_date": end.isoformat()})
+    ]
+
+def describe_shard(criteria):
+    """Short label for a shard used in progress output"""
+    parts = []
+    if len(criteria.get("fiscal_years") or []) == 1:
+        parts.append(f"FY{criteria['fiscal_years'][0]}")
+    if len(criteria.get("activity_codes") or []) == 1:
+        parts.append(criteria["activity_codes"][0])
+    if "project_start_date" in criteria:
+        date_range = criteria["project_start_date"]
+        parts.append(f"{date_range['from_date']}..{date_range['to_date']}")
+    return " ".join(parts) or "all"
+
+def iter_shard_pages(payload, max_workers=MAX_WORKERS, failed=None):
+    """Yield (plan path, projects) for every page of a sharded search as soon as it arrives
+
+    Shards are split until each fits in a single page. At most max_workers requests are
+    outstanding, so only the pages in flight are held in memory. Sorting by plan path
+    reproduces a sequential walk of the shards. Pages that fail are skipped; pass a list as
+    failed to collect their labels.
     """
-    try:
-        today = datetime.now()
-        project_start_str = project.get("project_start_date", "")
-        project_end_str = project.get("project_end_date", "")
-        
-        if not project_end_str:
-            fy = project.get("fiscal_year", "")
-            return fy in [2024, 2025]
+    payload = dict(payload, limit=PAGE_SIZE)
+    backlog = deque()
+    pending = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def fill():
+            # Queued shards wait here rather than as futures, so unread pages cannot pile up
+            while backlog and len(pending) < max_workers:
+                path, criteria, offset = backlog.popleft()
+                future = executor.submit(fetch_page, dict(payload, criteria=criteria), offset)
+                pending[future] = (path, criteria, offset)
         
-        project_end = datetime.strptime(project_end_str[:10], '%Y-%m-%d')
-        years_remaining = (project_end - today).days / 365.25
+        def submit(path, criteria, offset=0):
+            backlog.append((path, criteria, offset))
+            fill()
         
-        if years_remaining >= 1.5:
-            return True
+        submit((), payload["criteria"])
         
-        if project_start_str:
-            project_start = datetime.strptime(project_start_str[:10], '%Y-%m-%d')
-            years_since_start = (today - project_start).days / 365.25
-            if years_since_start <= 1.0:
-                return True
-        
-        return False
-        
-    except (ValueError, TypeError):
-        fy = project.get("fiscal_year", "")
-        return fy in [2024, 2025]
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, criteria, offset = pending.pop(future)
+                label = describe_shard(criteria)
+                fill()
+                
+                try:
+                    data = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"API request failed for shard {label} (offset {offset}): {e}")
+                    if failed is not None:
+                        failed.append(f"{label} (offset {offset})")
+                    continue
+                
+                page = data.get("results") or []
+                if offset > 0:
+                    yield path, page
+                    continue
+                
+                total = data.get("meta", {}).get("total", len(page))
+                if total <= len(page):
+                    print(f"✓ Shard {label}: {len(page)} projects")
+                    yield path, page
+                    continue
+                
+                children = split_shard(criteria)
+                if children:
+                    print(f"  Shard {label} reports {total} projects, splitting into {len(children)}")
+                    for i, child in enumerate(children):
+                        submit(path + (i,), child)
+                    continue
+                
+                # Shard cannot be split further; page through it up to the offset ceiling
+                if total > OFFSET_CEILING:
+                    print(f"  Warning: shard {label} has {total} projects, only {OFFSET_CEILING} reachable")
+                for page_offset in range(PAGE_SIZE, min(total, OFFSET_CEILING), PAGE_SIZE):
+                    submit(path + (page_offset,), criteria, page_offset)
+                yield path, page
 
-def fetch_mayo_grants():
-    """Fetch Mayo Rochester grants from NIH API"""
-    url = "https://api.reporter.nih.gov/v2/projects/search"
-    
+def fetch_sharded(payload, max_workers=MAX_WORKERS, failed=None):
+    """Fetch a search by splitting it into shards that each fit in a single page"""
+    pages = dict(iter_shard_pages(payload, max_workers, failed))
+    
+    # Merge shards in plan order and drop projects returned by more than one shard
+    merged = []
+    seen = set()
+    for path in sorted(pages):
+        for project in pages[path]:
+            key = project.get("full_project_num")
+            if key:
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged.append(project)
+    
+    return merged
+
+def mayo_grants_payload(added_since=None):
+    """Search payload for gold-tier Mayo Rochester grants, optionally only records added since a date"""
     fields = [
         "PrincipalInvestigators", "OrgName", "OrgCity", "OrgState",
         "ProjectTitle", "PublicHealthRelevance", "SpendingCategories",
@@ -63,113 +177,109 @@ def fetch_mayo_grants():
         },
         "include_fields": fields,
         "offset": 0,
-        "limit": 500,
+        "limit": PAGE_SIZE,
         "sort_field": "FiscalYear",
         "sort_order": "desc"
     }
     
-    headers = {"Content-Type": "application/json", "Accept": "application/json"}
-    all_projects = []
-    offset = 0
+    if added_since:
+        payload["criteria"]["date_added"] = {"from_date": added_since}
     
-    print("Fetching Mayo Rochester grants...")
+    print("Fetching Mayo Rochester grants..." if not added_since else f"Fetching Mayo Rochester grants added since {added_since}...")
     print(f"Grant types: {', '.join(gold_tier_types)}")
     print("Filter: 1.5+ years remaining OR started within last year")
     print("=" * 60)
     
-    while True:
-        payload["offset"] = offset
-        
-        try:
-            print(f"Requesting projects {offset + 1} to {offset + 500}...")
-            time.sleep(1)
-            
-            response = requests.post(url, headers=headers, data=json.dumps(payload))
-            response.raise_for_status()
-            data = response.json()
-            
-            if "results" not in data:
-                break
-                
-            projects = data["results"]
-            if not projects:
-                break
-            
-            all_projects.extend(projects)
-            print(f"✓ Fetched {len(projects)} projects (Total: {len(all_projects)})")
-            
-            if len(projects) < 500:
-                break
-            offset += 500
-            
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed: {e}")
-            break
-    
-    return all_projects
+    return payload
+
+def load_sync_state(filename=STATE_FILE):
+    """Load the incremental sync state, or None if there has been no sync yet"""
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def save_sync_state(project_nums, filename=STATE_FILE):
+    """Record the known project numbers and the time of this sync
+
+    project_nums must already be sorted; they are written as they are read, so a large set can
+    come straight from disk.
+    """
+    temporary = f"{filename}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(f'{{\n  "last_sync": {json.dumps(date.today().isoformat())},\n  "known_project_nums": [')
+        separator = "\n    "
+        for project_num in project_nums:
+            if project_num:
+                f.write(separator + json.dumps(project_num))
+                separator = ",\n    "
+        f.write("]\n}" if separator == "\n    " else "\n  ]\n}")
+    os.replace(temporary, filename)
+
+def sync_state_blocked(failed):
+    """True when shard pages failed: their records would fall outside the next date_added window"""
+    if failed:
+        print(f"✗ {len(failed)} shard requests failed; not advancing the sync state, so the next run asks again")
+    return bool(failed)
+
+def tracks_sync_state(args, failed=(), filename=STATE_FILE):
+    """Whether this run should record sync state: --incremental runs, or once a state file exists
+
+    A replayed snapshot says nothing about what the API holds today, so replays never do. Nor do
+    runs where shard pages failed.
+    """
+    if sync_state_blocked(failed):
+        return False
+    return not args.replay and (args.incremental or os.path.exists(filename))
+
+def row_timing_fields(record):
+    """Map a saved grant record back to the API fields used by the timing filter"""
+    return {
+        "project_start_date": format_value(record.project_start),
+        "project_end_date": format_value(record.project_end),
+        "fiscal_year": record.fiscal_year
+    }
+
+def merge_incremental(existing_rows, new_rows):
+    """Merge newly fetched rows into the saved dataset, re-applying the timing filter"""
+    updated_nums = {row.full_project_num for row in new_rows if row.full_project_num}
+    candidates = [row for row in existing_rows if row.full_project_num not in updated_nums]
+    relevant = hiring_mask(timing_columns([row_timing_fields(row) for row in candidates]))
+    kept = [row for row, keep in zip(candidates, relevant) if keep]
+    expired = len(candidates) - len(kept)
+    
+    print(f"\nMerging {len(new_rows)} fetched grants into {len(existing_rows)} saved grants "
+          f"({len(existing_rows) - len(kept) - expired} updated, {expired} no longer hiring-relevant)")
+    
+    # New rows come first so they win fiscal-year ties during deduplication
+    return new_rows + kept
+
+def normalize_project(project):
+    """Flatten an API project into a grant record"""
+    return GrantRecord.from_api(
+        project,
+        pi_names=extract_pi_names(project.get("principal_investigators", [])),
+        spending_categories=extract_spending_categories(project.get("spending_categories", []))
+    )
 
 def process_projects(projects):
     """Process and filter projects for hiring relevance"""
-    processed = []
-    filtered_count = 0
-    
     print(f"\nApplying timing filters to {len(projects)} projects...")
     
-    for project in projects:
-        if is_hiring_relevant(project):
-            processed_project = {
-                "PI_NAMEs": extract_pi_names(project.get("principal_investigators", [])),
-                "ORG_NAME": project.get("organization", {}).get("name", ""),
-                "ORG_CITY": project.get("organization", {}).get("city", ""),
-                "ORG_STATE": project.get("organization", {}).get("state", ""),
-                "PROJECT_TITLE": project.get("project_title", ""),
-                "PHR": project.get("phr", ""),
-                "NIH_SPENDING_CATS": extract_spending_categories(project.get("spending_categories", [])),
-                "FY": str(project.get("fiscal_year", "")).strip(),
-                "SUPPORT_YEAR": str(project.get("support_year", "")).strip(),
-                "PROJECT_START": project.get("project_start_date", ""),
-                "PROJECT_END": project.get("project_end_date", ""),
-                "TOTAL_COST": str(project.get("award_amount", "")).strip(),
-                "ACTIVITY": project.get("activity_code", ""),
-                "APPLICATION_TYPE": str(project.get("application_type_code", "")).strip(),
-                "FULL_PROJECT_NUM": project.get("full_project_num", "")
-            }
-            processed.append(processed_project)
-            filtered_count += 1
-            
-            if filtered_count <= 5:
-                timing = get_timing_reason(project)
-                pi = processed_project["PI_NAMEs"].split(';')[0].strip()
-                activity = processed_project["ACTIVITY"]
-                title = processed_project["PROJECT_TITLE"][:40]
-                print(f"✓ {activity} - {timing}: {pi[:20]} - {title}...")
-    
-    print(f"\nFilter results: {filtered_count}/{len(projects)} grants kept ({filtered_count/len(projects)*100:.1f}%)")
+    # Dates are parsed once per distinct value and the filter runs over whole columns
+    columns = timing_columns(projects)
+    kept = [i for i, keep in enumerate(hiring_mask(columns)) if keep]
+    
+    processed = [normalize_project(projects[i]) for i in kept]
+    
+    for record, timing in zip(processed, timing_reasons(columns, kept[:5])):
+        pi = record.pi_names.split(';')[0].strip()
+        print(f"✓ {record.activity} - {timing}: {pi[:20]} - {record.project_title[:40]}...")
+    
+    print(f"\nFilter results: {len(kept)}/{len(projects)} grants kept ({len(kept)/len(projects)*100:.1f}%)")
     return processed
 
-def get_timing_reason(project):
-    """Get reason why project passed timing filter"""
-    try:
-        today = datetime.now()
-        project_end_str = project.get("project_end_date", "")
-        project_start_str = project.get("project_start_date", "")
-        
-        if project_end_str:
-            project_end = datetime.strptime(project_end_str[:10], '%Y-%m-%d')
-            years_remaining = (project_end - today).days / 365.25
-            if years_remaining >= 1.5:
-                return f"{years_remaining:.1f}y remaining"
-        
-        if project_start_str:
-            project_start = datetime.strptime(project_start_str[:10], '%Y-%m-%d')
-            years_since_start = (today - project_start).days / 365.25
-            if years_since_start <= 1.0:
-                return f"Started {years_since_start:.1f}y ago"
-        
-        return "Recent FY"
-    except (ValueError, TypeError):
-        return "Recent FY"
-
 def extract_pi_names(pi_list):
     """Extract PI names from API response"""
     if not pi_list:
@@ -236,23 +346,19 @@ def update_readme(stats):
     
     print("✓ Updated README.md with current statistics")
 
-def save_to_csv(projects, filename):
-    """Save projects to CSV file"""
+def save_to_csv(projects, filename, output_format="csv"):
+    """Save projects to CSV file (or Parquet when output_format is parquet)"""
     if not projects:
         print("No projects to save")
         return
     
-    fieldnames = [
-        "PI_NAMEs", "ORG_NAME", "ORG_CITY", "ORG_STATE",
-        "PROJECT_TITLE", "PHR", "NIH_SPENDING_CATS",
-        "FY", "SUPPORT_YEAR", "PROJECT_START", "PROJECT_END",
-        "TOTAL_COST", "ACTIVITY", "APPLICATION_TYPE", "FULL_PROJECT_NUM"
-    ]
-    
-    with open(filename, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(projects)
+    if output_format == "parquet":
+        filename = write_parquet(to_csv_rows(projects, GRANT_FIELDS), GRANT_FIELDS, filename)
+    else:
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=GRANT_FIELDS)
+            writer.writeheader()
+            writer.writerows(project.to_csv_row(GRANT_FIELDS) for project in projects)
     
     print(f"✓ Saved {len(projects)} projects to {filename}")
 
@@ -261,26 +367,14 @@ def analyze_results(projects):
     if not projects:
         return {}
     
+    activity_counts, fiscal_years, total_funding = grant_aggregates(projects)
+    return report_statistics(len(projects), activity_counts, fiscal_years, total_funding)
+
+def report_statistics(total_grants, activity_counts, fiscal_years, total_funding):
+    """Display grant statistics and return them for the README update"""
     print(f"\nGrant Analysis:")
     print("=" * 40)
-    print(f"Total hiring-relevant grants: {len(projects)}")
-    
-    activity_counts = {}
-    fiscal_years = {}
-    total_funding = 0
-    
-    for project in projects:
-        activity = project.get("ACTIVITY", "").strip()
-        fy = project.get("FY", "").strip()
-        cost_str = project.get("TOTAL_COST", "").strip()
-        
-        if activity:
-            activity_counts[activity] = activity_counts.get(activity, 0) + 1
-        if fy:
-            fiscal_years[fy] = fiscal_years.get(fy, 0) + 1
-        
-        if cost_str and cost_str.replace('.', '').replace(',', '').isdigit():
-            total_funding += float(cost_str.replace(',', ''))
+    print(f"Total hiring-relevant grants: {total_grants}")
     
     print(f"\nGrant Types:")
     for activity, count in sorted(activity_counts.items(), key=lambda x: x[1], reverse=True):
@@ -291,78 +385,149 @@ def analyze_results(projects):
         print(f"  FY{fy}: {count:3d} grants")
     
     if total_funding > 0:
-        print(f"\nFunding: ${total_funding:,.0f} total, ${total_funding/len(projects):,.0f} average")
+        print(f"\nFunding: ${total_funding:,.0f} total, ${total_funding/total_grants:,.0f} average")
     
     # Return stats for README update
     return {
-        "total_grants": len(projects),
+        "total_grants": total_grants,
         "total_funding": total_funding,
-        "avg_funding": total_funding / len(projects) if len(projects) > 0 else 0,
+        "avg_funding": total_funding / total_grants if total_grants > 0 else 0,
         "top_grant_types": sorted(activity_counts.items(), key=lambda x: x[1], reverse=True)[:3],
         "r01_count": activity_counts.get("R01", 0),
         "center_grants": activity_counts.get("P30", 0) + activity_counts.get("P50", 0)
     }
 
-def deduplicate_by_project_title(projects):
-    """Keep only the most recent fiscal year for each unique project title"""
-    print(f"\nDeduplicating {len(projects)} projects by title...")
-    
-    title_groups = {}
-    for project in projects:
-        title = project.get("PROJECT_TITLE", "").strip()
-        if not title:
-            continue
-        
-        fy = project.get("FY", "").strip()
-        if not fy or not fy.isdigit():
+def dedup_key(project):
+    """Dedup key: core project number (5R01CA123456-03 -> R01CA123456), else "title:<stripped title>", else None"""
+    core = core_project_num(project.full_project_num)
+    if core:
+        return core
+    title = project.project_title.strip()
+    return f"title:{title}" if title else None
+
+def fiscal_year_value(project):
+    """FY as an int for picking the latest row; missing or malformed years never win"""
+    fy = project.fiscal_year
+    return fy if isinstance(fy, int) else -1
+
+def deduplicate_projects(projects):
+    """Keep only the most recent fiscal year of each project
+
+    Rows are grouped by core project number, so renewals and retitled years collapse into one
+    project, falling back to the title for rows without a number. A single pass keeps the
+    latest FY per key (the first row seen wins ties); rows with neither are kept as they are.
+    """
+    print(f"\nDeduplicating {len(projects)} projects by project number...")
+    
+    winners = {}  # key -> [fy, project, rows seen], in order of first appearance
+    for index, project in enumerate(projects):
+        key = dedup_key(project) or index
+        fy = fiscal_year_value(project)
+        entry = winners.get(key)
+        if entry is None:
+            winners[key] = [fy, project, 1]
             continue
-        
-        fy_int = int(fy)
-        
-        if title not in title_groups:
-            title_groups[title] = []
-        title_groups[title].append((fy_int, project))
+        entry[2] += 1
+        if fy > entry[0]:
+            entry[0], entry[1] = fy, project
     
     deduplicated = []
     duplicates_removed = 0
-    
-    for title, project_list in title_groups.items():
-        project_list.sort(key=lambda x: x[0], reverse=True)
-        most_recent_fy, most_recent_project = project_list[0]
-        deduplicated.append(most_recent_project)
-        
-        if len(project_list) > 1:
-            duplicates_removed += len(project_list) - 1
-            pi = most_recent_project.get("PI_NAMEs", "").split(';')[0].strip()
-            activity = most_recent_project.get("ACTIVITY", "")
-            print(f"  Kept FY{most_recent_fy} for: {activity} - {pi[:25]} - {title[:50]}...")
+    for fy, project, seen in winners.values():
+        deduplicated.append(project)
+        if seen > 1:
+            duplicates_removed += seen - 1
+            report_kept(fy, project)
     
     print(f"Removed {duplicates_removed} duplicates, kept {len(deduplicated)} unique projects")
     return deduplicated
 
+def report_kept(fy, project):
+    """Print the fiscal year kept for a project that had duplicates; returns None"""
+    pi = project.pi_names.split(';')[0].strip()
+    print(f"  Kept FY{fy} for: {project.activity} - {pi[:25]} - {project.project_title.strip()[:50]}...")
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Fetch hiring-relevant Mayo Rochester grants")
+    add_api_arguments(parser)
+    add_store_arguments(parser)
+    add_format_arguments(parser)
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"Only fetch records added since the last sync recorded in {STATE_FILE}")
+    parser.add_argument("--stream", action="store_true",
+                        help="Hold one page in memory at a time, spooling rows to disk (full pulls to CSV)")
+    args = parser.parse_args()
+    if args.stream and (args.incremental or args.format != "csv"):
+        parser.error("--stream writes a full pull to CSV and cannot be combined with --incremental or --format parquet")
+    if args.replay and args.incremental:
+        parser.error("--replay re-runs a recorded pull and cannot be combined with --incremental")
+    configure_api_from_args(args)
+    
     print("Mayo Rochester - Hiring-Relevant Gold Tier Grants")
     print("=" * 50)
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    projects = fetch_mayo_grants()
-    if not projects:
+    # A replay reproduces a past report next to the live one, leaving the README and warehouse alone
+    output = replay_output(output_filename("mayo_grants.csv", args.format))
+    if args.stream:
+        # Imported here because grant_stream builds on this module
+        from grant_stream import stream_mayo_grants
+        state_file = STATE_FILE if tracks_sync_state(args) else None
+        stats = stream_mayo_grants(output, db=None if args.no_db or args.replay else args.db, state_file=state_file)
+        if stats:
+            if not args.replay:
+                update_readme(stats)
+            print(f"\nSuccess! {stats['total_grants']} hiring-relevant grants saved to {output}")
+        return
+    
+    # Incremental mode only asks for records added since the last sync and merges them
+    # into the saved dataset; without saved state it falls back to a full pull
+    state = load_sync_state() if args.incremental else None
+    existing = [GrantRecord.from_csv_row(row) for row in read_rows(output)] if state else []
+    added_since = None
+    
+    if state and existing:
+        last_sync = date.fromisoformat(state["last_sync"])
+        added_since = (last_sync - timedelta(days=INCREMENTAL_OVERLAP_DAYS)).isoformat()
+    elif args.incremental:
+        print("No previous sync found, running a full pull")
+        print()
+    
+    # Pagination, filtering and dedup run as overlapping stages, so the work left after the
+    # last page arrives is the final write
+    from grant_pipeline import run_pipeline
+    failed = []
+    deduplicated_processed, processed, aggregates, fetched_nums = run_pipeline(added_since, failed=failed)
+    if not fetched_nums and not processed and not added_since:
         print("No projects found")
         return
     
-    processed = process_projects(projects)
+    if added_since:
+        known = set(state.get("known_project_nums", []))
+        new_count = len(fetched_nums - known)
+        print(f"Incremental sync: {new_count} new records, {len(fetched_nums) - new_count} already known")
+        processed = merge_incremental(existing, processed)
+        deduplicated_processed = deduplicate_projects(processed) if processed else []
+        aggregates = grant_aggregates(deduplicated_processed)
+    
     if not processed:
         print("No projects passed filters")
         return
     
-    deduplicated_processed = deduplicate_by_project_title(processed)
-    save_to_csv(deduplicated_processed, "mayo_grants.csv")
-    stats = analyze_results(deduplicated_processed)
-    update_readme(stats)
+    save_to_csv(deduplicated_processed, output, args.format)
+    upsert_from_args(args, processed)
+    stats = report_statistics(len(deduplicated_processed), *aggregates)
+    if not args.replay:
+        update_readme(stats)
+    
+    if tracks_sync_state(args, failed):
+        known = set(state.get("known_project_nums", [])) if added_since else set()
+        known.update(fetched_nums)
+        save_sync_state(sorted(known))
     
-    print(f"\nSuccess! {len(deduplicated_processed)} hiring-relevant grants saved to mayo_grants.csv")
+    print(f"\nSuccess! {len(deduplicated_processed)} hiring-relevant grants saved to {output}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""Staged version of the fetch_grants pipeline
+
+Pagination, the timing filter and dedup run concurrently. Each stage runs on its own thread
+and hands results to the next through a bounded queue, so a slow stage holds back the ones
+before it rather than letting pages pile up. Dedup and the statistics are kept up to date as
+rows arrive, so once the last page is in only the final write remains.
+"""
+import queue
+import threading
+from collections import Counter
+
+from fetch_grants import (
+    MAX_WORKERS, iter_shard_pages, mayo_grants_payload, normalize_project, dedup_key, fiscal_year_value, report_kept
+)
+from hiring_timing import timing_columns, hiring_mask, timing_reasons, total_cost
+from grant_record import format_value
+from grant_stream import order_key
+
+QUEUE_SIZE = 8  # pages buffered between two stages
+
+class StageFailure:
+    def __init__(self, error):
+        self.error = error
+
+FINISHED = object()
+
+def pipelined(items, maxsize=QUEUE_SIZE):
+    """Drain an iterator on a background thread through a bounded queue
+
+    The producer blocks while the queue is full, so the consumer sets the pace. Errors raised
+    by the producer are re-raised in the consumer, and abandoning the generator stops the producer.
+    """
+    buffer = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(StageFailure(e))
+            return
+        put(FINISHED)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is FINISHED:
+                return
+            if isinstance(item, StageFailure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+
+def filter_stage(pages, preview=5):
+    """Timing-filter and normalize pages, yielding (path, project numbers, [(index, row), ...])"""
+    shown = 0
+    for path, page in pages:
+        columns = timing_columns(page)
+        kept = [index for index, keep in enumerate(hiring_mask(columns)) if keep]
+        rows = [(index, normalize_project(page[index])) for index in kept]
+
+        if shown < preview and kept:
+            for (_, record), timing in zip(rows, timing_reasons(columns, kept[:preview - shown])):
+                pi = record.pi_names.split(';')[0].strip()
+                print(f"✓ {record.activity} - {timing}: {pi[:20]} - {record.project_title[:40]}...")
+                shown += 1
+
+        yield path, [project.get("full_project_num") for project in page], rows
+
+class ProjectWinners:
+    """Incremental deduplicate_projects with statistics over the current winners
+
+    Each dedup key keeps its most recent FY row; ties go to the row earliest in shard plan order,
+    and keys are listed in order of first appearance, so the result matches the batch dedup
+    no matter what order pages arrive in.
+    """
+
+    def __init__(self):
+        self.entries = {}  # key -> [first order, fy, order, row, rows seen]
+        self.activity_counts = Counter()
+        self.fiscal_years = Counter()
+        self.total_funding = 0.0
+
+    def add(self, key, order, fy, row):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = [order, fy, order, row, 1]
+            self.count(row, 1)
+            return
+
+        entry[0] = min(entry[0], order)
+        entry[4] += 1
+        if fy > entry[1] or (fy == entry[1] and order < entry[2]):
+            self.count(entry[3], -1)
+            self.count(row, 1)
+            entry[1:4] = [fy, order, row]
+
+    def count(self, row, sign):
+        activity = row.activity.strip()
+        if activity:
+            self.activity_counts[activity] += sign
+        fy = format_value(row.fiscal_year)
+        if fy:
+            self.fiscal_years[fy] += sign
+        self.total_funding += sign * total_cost([row.total_cost])
+
+    def winners(self):
+        """Deduplicated rows in output order, reporting projects that had duplicates"""
+        rows = []
+        duplicates = 0
+        for _, fy, _, row, seen in sorted(self.entries.values(), key=lambda entry: entry[0]):
+            rows.append(row)
+            if seen > 1:
+                duplicates += seen - 1
+                report_kept(fy, row)
+        print(f"Removed {duplicates} duplicates, kept {len(rows)} unique projects")
+        return rows
+
+    def aggregates(self, rows):
+        """Running counts, re-keyed in order of first appearance in rows like analyze_results"""
+        activities, years = {}, {}
+        for row in rows:
+            activity, fy = row.activity.strip(), format_value(row.fiscal_year)
+            if activity and activity not in activities:
+                activities[activity] = self.activity_counts[activity]
+            if fy and fy not in years:
+                years[fy] = self.fiscal_years[fy]
+        return activities, years, self.total_funding
+
+def run_pipeline(added_since=None, max_workers=MAX_WORKERS, queue_size=QUEUE_SIZE, failed=None):
+    """Fetch, filter and dedup Mayo grants in overlapping stages
+
+    Returns (deduplicated rows, every kept row, aggregates for report_statistics, project
+    numbers fetched). Pass a list as failed to collect the shard pages that could not be fetched.
+    """
+    pages = pipelined(iter_shard_pages(mayo_grants_payload(added_since), max_workers, failed), queue_size)
+    filtered = pipelined(filter_stage(pages), queue_size)
+
+    winners = ProjectWinners()
+    processed = []
+    seen = set()
+    fetched = 0
+    for path, project_nums, rows in filtered:
+        # Shards can overlap when results shift between requests; like fetch_sharded, keep one copy
+        repeated = set()
+        for index, project_num in enumerate(project_nums):
+            if project_num:
+                if project_num in seen:
+                    repeated.add(index)
+                seen.add(project_num)
+        fetched += len(project_nums) - len(repeated)
+
+        for index, row in rows:
+            if index in repeated:
+                continue
+            processed.append(row)
+
+            # Rows with neither a project number nor a title are their own group
+            order = order_key(path, index)
+            winners.add(dedup_key(row) or order, order, fiscal_year_value(row), row)
+
+    print(f"✓ Fetched {fetched} unique projects in total")
+    if not fetched:
+        return [], [], None, seen
+    print(f"\nFilter results: {len(processed)}/{fetched} grants kept ({len(processed)/fetched*100:.1f}%)")
+    if not processed:
+        return [], [], None, seen
+
+    print(f"\nDeduplicating {len(processed)} projects by project number...")
+    deduplicated = winners.winners()
+    return deduplicated, processed, winners.aggregates(deduplicated), seen
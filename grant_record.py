@@ -0,0 +1,160 @@
+"""Typed, slotted record for a grant row, shared by the fetch scripts
+
+Fields are parsed once when a record is built: fiscal year, support year and cost become ints and
+project dates become dates (shared per distinct value). Values that do not parse are kept as the
+stripped text, so nothing is lost on the way back out. to_csv_row writes any of the scripts'
+column layouts, and to_json / from_json are a compact positional form for spooling.
+"""
+from dataclasses import dataclass, fields
+from datetime import date
+from functools import lru_cache
+
+# Column each field is written under; FIELD_OF_COLUMN also accepts the other scripts' names
+COLUMNS = {
+    "pi_names": "PI_NAMEs",
+    "org_name": "ORG_NAME",
+    "org_city": "ORG_CITY",
+    "org_state": "ORG_STATE",
+    "project_title": "PROJECT_TITLE",
+    "phr": "PHR",
+    "spending_categories": "NIH_SPENDING_CATS",
+    "fiscal_year": "FY",
+    "support_year": "SUPPORT_YEAR",
+    "project_start": "PROJECT_START",
+    "project_end": "PROJECT_END",
+    "total_cost": "TOTAL_COST",
+    "activity": "ACTIVITY",
+    "application_type": "APPLICATION_TYPE",
+    "full_project_num": "FULL_PROJECT_NUM",
+    "relevance": "RELEVANCE",
+    "reasoning": "REASONING",
+    "abstract": "ABSTRACT",
+    "fetch_status": "FETCH_STATUS",
+}
+FIELD_OF_COLUMN = {column: field for field, column in COLUMNS.items()}
+FIELD_OF_COLUMN.update({
+    "FISCAL_YEAR": "fiscal_year",
+    "PROJECT_NUM": "full_project_num",
+    "Relevance": "relevance",
+    "Reasoning": "reasoning",
+})
+
+def parse_int(value):
+    """int for whole numbers, None for blanks, otherwise the stripped text"""
+    if value is None or isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    return int(text) if text.isdigit() else text
+
+@lru_cache(maxsize=65536)
+def parse_date_text(text):
+    text = text.strip()
+    if not text:
+        return None
+    if len(text) == 10 or text[10:] == "T00:00:00":
+        try:
+            return date.fromisoformat(text[:10])
+        except ValueError:
+            pass
+    return text
+
+def parse_date(value):
+    """date for API-style dates, None for blanks, otherwise the stripped text"""
+    if value is None or isinstance(value, date):
+        return value
+    return parse_date_text(str(value))
+
+def format_value(value):
+    """CSV text for a field value, in the format the API and the saved CSVs use"""
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return f"{value.isoformat()}T00:00:00"
+    return value if isinstance(value, str) else str(value)
+
+@dataclass(slots=True)
+class GrantRecord:
+    pi_names: str = ""
+    org_name: str = ""
+    org_city: str = ""
+    org_state: str = ""
+    project_title: str = ""
+    phr: str = ""
+    spending_categories: str = ""
+    fiscal_year: int | str | None = None
+    support_year: int | str | None = None
+    project_start: date | str | None = None
+    project_end: date | str | None = None
+    total_cost: int | str | None = None
+    activity: str = ""
+    application_type: str = ""
+    full_project_num: str = ""
+    relevance: str = ""
+    reasoning: str = ""
+    abstract: str = ""
+    fetch_status: str = ""
+
+    def __post_init__(self):
+        self.fiscal_year = parse_int(self.fiscal_year)
+        self.support_year = parse_int(self.support_year)
+        self.total_cost = parse_int(self.total_cost)
+        self.project_start = parse_date(self.project_start)
+        self.project_end = parse_date(self.project_end)
+
+    @classmethod
+    def from_api(cls, project, pi_names="", spending_categories=""):
+        """Record for an API project; PI names and spending categories come pre-flattened"""
+        organization = project.get("organization") or {}
+        return cls(
+            pi_names=pi_names,
+            org_name=organization.get("name") or "",
+            org_city=organization.get("city") or "",
+            org_state=organization.get("state") or "",
+            project_title=project.get("project_title") or "",
+            phr=project.get("phr") or "",
+            spending_categories=spending_categories,
+            fiscal_year=project.get("fiscal_year"),
+            support_year=project.get("support_year"),
+            project_start=project.get("project_start_date"),
+            project_end=project.get("project_end_date"),
+            total_cost=project.get("award_amount"),
+            activity=project.get("activity_code") or "",
+            application_type=str(project.get("application_type_code") or "").strip(),
+            full_project_num=project.get("full_project_num") or "",
+        )
+
+    @classmethod
+    def from_csv_row(cls, row):
+        """Record for a CSV row from any of the scripts; unknown columns are ignored"""
+        values = {}
+        for column, value in row.items():
+            name = FIELD_OF_COLUMN.get(column)
+            if name and value is not None:
+                values[name] = value.strip() if isinstance(value, str) else value
+        return cls(**values)
+
+    @classmethod
+    def from_json(cls, values):
+        """Inverse of to_json"""
+        return cls(*values)
+
+    def to_csv_row(self, fieldnames):
+        """CSV-style string row with the given columns"""
+        return {column: format_value(getattr(self, FIELD_OF_COLUMN[column])) for column in fieldnames}
+
+    def to_json(self):
+        """Field values in declaration order, with dates as ISO strings"""
+        return [value.isoformat() if isinstance(value, date) else value
+                for value in (getattr(self, name) for name in FIELD_NAMES)]
+
+    @property
+    def fy_text(self):
+        return format_value(self.fiscal_year)
+
+FIELD_NAMES = tuple(field.name for field in fields(GrantRecord))
+
+def to_csv_rows(records, fieldnames):
+    """CSV-style string rows for csv.DictWriter or write_parquet"""
+    return [record.to_csv_row(fieldnames) for record in records]
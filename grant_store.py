@@ -0,0 +1,305 @@
+"""Local SQLite warehouse for grants, opportunities and abstracts
+
+    python grant_store.py --import                          # load the existing CSVs
+    python grant_store.py "machine learning"                # full-text search
+    python grant_store.py "imag* OR segmentation" --activity R01 U01 --ending-after 2026-06-30
+
+Records are keyed by core project number, so every fiscal year and supplement of a project
+collapses to one row; rows without a project number fall back to their normalized title and
+are merged into the numbered row with the same title when there is one.
+Award fields follow the most recent fiscal year seen; abstracts and relevance notes are kept
+from whichever source supplied them. Activity code, fiscal year and end date are indexed, and an
+FTS5 index covers PROJECT_TITLE, PHR and ABSTRACT.
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from grant_record import GrantRecord
+
+DB_FILE = "grants.db"
+SOURCE_CSVS = ["mayo_grants.csv", "opportunities.csv", "project_abstracts.csv", "opportunities_with_abstracts.csv"]
+
+# (column, CSV field); award fields follow the latest fiscal year, annotations merge
+AWARD_COLUMNS = [
+    ("full_project_num", "FULL_PROJECT_NUM"),
+    ("pi_names", "PI_NAMEs"),
+    ("org_name", "ORG_NAME"),
+    ("org_city", "ORG_CITY"),
+    ("org_state", "ORG_STATE"),
+    ("project_title", "PROJECT_TITLE"),
+    ("phr", "PHR"),
+    ("nih_spending_cats", "NIH_SPENDING_CATS"),
+    ("fy", "FY"),
+    ("support_year", "SUPPORT_YEAR"),
+    ("project_start", "PROJECT_START"),
+    ("project_end", "PROJECT_END"),
+    ("total_cost", "TOTAL_COST"),
+    ("activity", "ACTIVITY"),
+    ("application_type", "APPLICATION_TYPE"),
+]
+ANNOTATION_COLUMNS = [
+    ("abstract", "ABSTRACT"),
+    ("relevance", "RELEVANCE"),
+    ("reasoning", "REASONING"),
+]
+COLUMNS = AWARD_COLUMNS + ANNOTATION_COLUMNS
+FIELDS = [field for _, field in COLUMNS]
+INTEGER_COLUMNS = {"fy", "total_cost"}
+
+# The abstract outputs and opportunities.csv name a few fields differently
+FIELD_ALIASES = {
+    "FISCAL_YEAR": "FY",
+    "PROJECT_NUM": "FULL_PROJECT_NUM",
+    "Relevance": "RELEVANCE",
+    "Reasoning": "REASONING",
+}
+
+CORE_PROJECT_NUM = re.compile(r"^\s*\d?\s*([A-Z][A-Z0-9]{2}[A-Z]{2}\d+)", re.IGNORECASE)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS grants (
+    core_project_num TEXT PRIMARY KEY,
+    {", ".join(f"{column} {'INTEGER' if column in INTEGER_COLUMNS else 'TEXT'}" for column, _ in COLUMNS)},
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS grant_titles (
+    title TEXT PRIMARY KEY,
+    core_project_num TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS grants_activity ON grants (activity);
+CREATE INDEX IF NOT EXISTS grants_fy ON grants (fy);
+CREATE INDEX IF NOT EXISTS grants_project_end ON grants (project_end);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS grants_fts USING fts5(
+    project_title, phr, abstract, content='grants', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS grants_fts_insert AFTER INSERT ON grants BEGIN
+    INSERT INTO grants_fts (rowid, project_title, phr, abstract)
+    VALUES (new.rowid, new.project_title, new.phr, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS grants_fts_delete AFTER DELETE ON grants BEGIN
+    INSERT INTO grants_fts (grants_fts, rowid, project_title, phr, abstract)
+    VALUES ('delete', old.rowid, old.project_title, old.phr, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS grants_fts_update AFTER UPDATE ON grants BEGIN
+    INSERT INTO grants_fts (grants_fts, rowid, project_title, phr, abstract)
+    VALUES ('delete', old.rowid, old.project_title, old.phr, old.abstract);
+    INSERT INTO grants_fts (rowid, project_title, phr, abstract)
+    VALUES (new.rowid, new.project_title, new.phr, new.abstract);
+END;
+"""
+
+def core_project_num(project_num):
+    """Strip the application type and budget/supplement suffix: 5U24DK100469-09 -> U24DK100469"""
+    match = CORE_PROJECT_NUM.match(project_num or "")
+    return match.group(1).upper() if match else ""
+
+def normalized_title(title):
+    return " ".join((title or "").lower().split())
+
+def record_key(record):
+    """Core project number, or the normalized title for rows that carry no project number"""
+    core = core_project_num(record["full_project_num"])
+    if core:
+        return core
+    title = normalized_title(record["project_title"])
+    return f"title:{title}" if title else ""
+
+def to_record(row):
+    """Map a CSV row or grant record from any of the scripts onto store columns, with blanks as NULL"""
+    if isinstance(row, GrantRecord):
+        row = row.to_csv_row(FIELDS)
+    fields = {FIELD_ALIASES.get(key, key): value for key, value in row.items()}
+    record = {}
+    for column, field in COLUMNS:
+        value = fields.get(field)
+        value = str(value).strip() if value is not None else ""
+        if column in INTEGER_COLUMNS:
+            value = int(value) if value.isdigit() else None
+        record[column] = value if value != "" else None
+    return record
+
+def upsert_sql():
+    columns = [column for column, _ in COLUMNS]
+    # Award fields only move forward in fiscal year; annotations keep the last non-empty value
+    updates = [
+        f"{column} = CASE WHEN excluded.{column} IS NULL OR (excluded.fy < grants.fy AND grants.{column} IS NOT NULL) "
+        f"THEN grants.{column} ELSE excluded.{column} END"
+        for column, _ in AWARD_COLUMNS
+    ] + [
+        f"{column} = COALESCE(excluded.{column}, grants.{column})"
+        for column, _ in ANNOTATION_COLUMNS
+    ]
+    return (
+        f"INSERT INTO grants (core_project_num, {', '.join(columns)}, updated_at) "
+        f"VALUES ({', '.join('?' * (len(columns) + 2))}) "
+        f"ON CONFLICT (core_project_num) DO UPDATE SET {', '.join(updates)}, updated_at = excluded.updated_at"
+    )
+
+class GrantStore:
+    """SQLite store of grant records keyed by core project number, with FTS5 search"""
+
+    def __init__(self, filename=DB_FILE):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.row_factory = sqlite3.Row
+        indexed = self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'grant_titles'").fetchone()
+        self.connection.executescript(SCHEMA)
+        if not indexed:
+            self.index_titles()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def index_titles(self):
+        """Fill the normalized title -> core project number table for a store created before it"""
+        rows = self.connection.execute(
+            "SELECT core_project_num, project_title FROM grants WHERE core_project_num NOT LIKE 'title:%'"
+        ).fetchall()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO grant_titles (title, core_project_num) VALUES (?, ?)",
+                [(normalized_title(title), key) for key, title in rows if title]
+            )
+
+    def numbered_key(self, title):
+        """Core project number of a numbered row that has carried this normalized title, if any"""
+        row = self.connection.execute("SELECT core_project_num FROM grant_titles WHERE title = ?", (title,)).fetchone()
+        return row[0] if row else None
+
+    def merge_title_row(self, title_key, key, sql):
+        """Fold a row stored under its title into the row for its core project number"""
+        row = self.connection.execute("SELECT * FROM grants WHERE core_project_num = ?", (title_key,)).fetchone()
+        if row is None:
+            return
+        self.connection.execute("DELETE FROM grants WHERE core_project_num = ?", (title_key,))
+        self.connection.execute(sql, [key] + [row[column] for column, _ in COLUMNS] + [row["updated_at"]])
+
+    def upsert(self, rows):
+        """Insert or merge CSV-shaped rows; returns (stored, skipped without a number or title)
+
+        mayo_grants.csv has no project numbers while the other CSVs do, so a row keyed by its
+        title is merged into the numbered row with the same title, whichever arrives first.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        sql = upsert_sql()
+        stored = skipped = 0
+        with self.connection:
+            for row in rows:
+                record = to_record(row)
+                key = record_key(record)
+                if not key:
+                    skipped += 1
+                    continue
+
+                title = normalized_title(record["project_title"])
+                if key.startswith("title:"):
+                    key = self.numbered_key(title) or key
+                elif title:
+                    self.connection.execute(
+                        "INSERT OR IGNORE INTO grant_titles (title, core_project_num) VALUES (?, ?)", (title, key)
+                    )
+                    self.merge_title_row(f"title:{title}", key, sql)
+
+                self.connection.execute(sql, [key] + [record[column] for column, _ in COLUMNS] + [now])
+                stored += 1
+        return stored, skipped
+
+    def search(self, query=None, activities=None, min_fy=None, ending_after=None, limit=50):
+        """Full-text search over title, PHR and abstract, narrowed by the indexed columns"""
+        clauses, params = [], []
+        if query:
+            clauses.append("grants.rowid IN (SELECT rowid FROM grants_fts WHERE grants_fts MATCH ?)")
+            params.append(query)
+        if activities:
+            clauses.append(f"activity IN ({', '.join('?' * len(activities))})")
+            params.extend(activity.upper() for activity in activities)
+        if min_fy:
+            clauses.append("fy >= ?")
+            params.append(min_fy)
+        if ending_after:
+            clauses.append("project_end >= ?")
+            params.append(ending_after)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM grants {where} ORDER BY project_end DESC LIMIT ?"
+        try:
+            return self.connection.execute(sql, params + [limit]).fetchall()
+        except sqlite3.OperationalError:
+            if not query:
+                raise
+            # Not valid FTS5 syntax; search for the words literally instead
+            params[0] = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+            return self.connection.execute(sql, params + [limit]).fetchall()
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM grants").fetchone()[0]
+
+def add_store_arguments(parser):
+    """Add the shared warehouse switches to a script's argument parser"""
+    parser.add_argument("--db", default=DB_FILE, help=f"SQLite warehouse to upsert results into (default: {DB_FILE})")
+    parser.add_argument("--no-db", action="store_true", help="Do not write results to the SQLite warehouse")
+
+def upsert_from_args(args, rows):
+    """Upsert a script's output rows into the warehouse unless --no-db was given
+
+    Replayed runs never write: historical rows would overwrite what the warehouse holds today.
+    """
+    if args.no_db or getattr(args, "replay", None) or not rows:
+        return
+    with GrantStore(args.db) as store:
+        stored, skipped = store.upsert(rows)
+    note = f" ({skipped} without a project number or title skipped)" if skipped else ""
+    print(f"✓ Upserted {stored} records into {args.db}{note}")
+
+def import_csvs(store, filenames=SOURCE_CSVS):
+    """Load the scripts' existing CSV outputs into the store"""
+    for filename in filenames:
+        if not os.path.exists(filename):
+            print(f"- {filename} not found, skipping")
+            continue
+        with open(filename, "r", encoding="utf-8") as f:
+            stored, skipped = store.upsert(csv.DictReader(f))
+        print(f"✓ {filename}: {stored} rows upserted, {skipped} without a project number or title skipped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the local grant warehouse")
+    parser.add_argument("query", nargs="?", help="FTS5 query over title, PHR and abstract")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--import", dest="import_csvs", action="store_true",
+                        help=f"Upsert {', '.join(SOURCE_CSVS)} before querying")
+    parser.add_argument("--activity", nargs="+", help="Only these activity codes")
+    parser.add_argument("--min-fy", type=int, help="Only grants from this fiscal year onwards")
+    parser.add_argument("--ending-after", help="Only grants ending on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with GrantStore(args.db) as store:
+        if args.import_csvs:
+            import_csvs(store)
+            print(f"{store.count()} records in {args.db}")
+            print()
+
+        if not (args.query or args.activity or args.min_fy or args.ending_after):
+            return
+
+        rows = store.search(args.query, args.activity, args.min_fy, args.ending_after, args.limit)
+        for row in rows:
+            end = (row["project_end"] or "")[:10]
+            pi = (row["pi_names"] or "").split(";")[0].strip()
+            print(f"{row['full_project_num'] or '-':<16s} {row['activity'] or '':<4s} FY{row['fy'] or '':<5} ends {end:<10s} "
+                  f"{pi[:20]:<20s} {(row['project_title'] or '')[:60]}")
+        print(f"\n{len(rows)} matching grants")
+
+if __name__ == "__main__":
+    main()
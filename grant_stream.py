@@ -0,0 +1,239 @@
+"""Constant-memory version of the fetch_grants pipeline
+
+Pages flow through fetch -> timing filter -> normalize one at a time. Rows that pass are
+appended to a scratch spool file, and dedup keeps only a compact
+project key -> (first seen, FY, spool offset) map plus the project numbers fetched so far, which
+move to SQLite once they outgrow their budget. The final pass reads the winning rows back from the spool, writing the CSV and
+computing statistics as it goes. Output and counts match the batch pipeline row for row.
+"""
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+
+from fetch_grants import (
+    GRANT_FIELDS, MAX_WORKERS, iter_shard_pages, mayo_grants_payload, normalize_project, report_statistics,
+    dedup_key, fiscal_year_value, report_kept, save_sync_state, sync_state_blocked
+)
+from hiring_timing import timing_columns, hiring_mask, grant_aggregates
+from grant_store import GrantStore
+from grant_record import GrantRecord
+
+DEDUP_MEMORY_ENTRIES = 200000
+WRITE_CHUNK = 1000
+
+def order_key(path, index):
+    """Sortable string for a row's position in a sequential walk of the shard plan
+
+    Path components are marked "1" and the row index "0", so a page sorts before the pages of
+    its sub-shards, just like tuple comparison of (path, index).
+    """
+    return "".join(f"1{part:05d}" for part in path) + f"0{index:05d}"
+
+class ProjectDedup:
+    """Most recent fiscal year per dedup key, as key -> (first seen, FY, order, spool offset, count)
+
+    Also tracks every project number fetched, to drop repeats from overlapping shards. Both live
+    in memory until either holds more than max_entries, then in on-disk SQLite tables. Ties on FY
+    go to the row seen first, like deduplicate_projects.
+    """
+
+    def __init__(self, directory, max_entries=DEDUP_MEMORY_ENTRIES):
+        self.filename = os.path.join(directory, "dedup.sqlite")
+        self.max_entries = max_entries
+        self.entries = {}
+        self.fetched = set()
+        self.connection = None
+
+    def mark_fetched(self, project_nums):
+        """Record a page's project numbers; return the indices already fetched earlier"""
+        repeated = set()
+        if self.connection is None:
+            for index, project_num in enumerate(project_nums):
+                if project_num:
+                    if project_num in self.fetched:
+                        repeated.add(index)
+                    self.fetched.add(project_num)
+            if len(self.fetched) > self.max_entries:
+                self.spill()
+            return repeated
+
+        with self.connection:
+            for index, project_num in enumerate(project_nums):
+                if project_num and not self.connection.execute(
+                    "INSERT OR IGNORE INTO fetched VALUES (?)", (project_num,)
+                ).rowcount:
+                    repeated.add(index)
+        return repeated
+
+    def fetched_project_nums(self):
+        """Every project number fetched, in sorted order"""
+        if self.connection is None:
+            return iter(sorted(self.fetched))
+        return (row[0] for row in self.connection.execute("SELECT project_num FROM fetched ORDER BY project_num"))
+
+    def add(self, rows):
+        """rows are (key, order, fy, offset) tuples"""
+        if self.connection is None:
+            for key, order, fy, offset in rows:
+                entry = self.entries.get(key)
+                if entry is None:
+                    self.entries[key] = [order, fy, order, offset, 1]
+                    continue
+                entry[0] = min(entry[0], order)
+                if fy > entry[1] or (fy == entry[1] and order < entry[2]):
+                    entry[1:4] = [fy, order, offset]
+                entry[4] += 1
+            if len(self.entries) > self.max_entries:
+                self.spill()
+            return
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO projects VALUES (?, ?, ?, ?, ?, 1) ON CONFLICT (key) DO UPDATE SET "
+                "first_order = MIN(first_order, excluded.first_order), "
+                "best_fy = CASE WHEN excluded.best_fy > best_fy OR (excluded.best_fy = best_fy AND excluded.best_order < best_order) "
+                "THEN excluded.best_fy ELSE best_fy END, "
+                "best_order = CASE WHEN excluded.best_fy > best_fy OR (excluded.best_fy = best_fy AND excluded.best_order < best_order) "
+                "THEN excluded.best_order ELSE best_order END, "
+                "best_offset = CASE WHEN excluded.best_fy > best_fy OR (excluded.best_fy = best_fy AND excluded.best_order < best_order) "
+                "THEN excluded.best_offset ELSE best_offset END, "
+                "count = count + 1",
+                ((key, order, fy, order, offset) for key, order, fy, offset in rows)
+            )
+
+    def spill(self):
+        print(f"  Dedup map passed {self.max_entries} projects, moving it to disk")
+        self.connection = sqlite3.connect(self.filename)
+        self.connection.execute(
+            "CREATE TABLE projects (key TEXT PRIMARY KEY, first_order TEXT, best_fy INTEGER, "
+            "best_order TEXT, best_offset INTEGER, count INTEGER)"
+        )
+        self.connection.execute("CREATE TABLE fetched (project_num TEXT PRIMARY KEY)")
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?)",
+                ((key, *entry) for key, entry in self.entries.items())
+            )
+            self.connection.executemany("INSERT INTO fetched VALUES (?)", ((num,) for num in self.fetched))
+        self.entries = {}
+        self.fetched = set()
+
+    def winners(self):
+        """Yield (fy, spool offset, rows seen) in order of each key's first appearance"""
+        if self.connection is None:
+            for entry in sorted(self.entries.values(), key=lambda entry: entry[0]):
+                yield entry[1], entry[3], entry[4]
+            return
+
+        self.connection.execute("CREATE INDEX projects_first_order ON projects (first_order)")
+        yield from self.connection.execute(
+            "SELECT best_fy, best_offset, count FROM projects ORDER BY first_order"
+        )
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+def filter_pages(pages, spool, dedup, store=None):
+    """Timing-filter and normalize each page, spooling rows and feeding the dedup map
+
+    Returns (unique projects fetched, rows kept).
+    """
+    fetched = kept = 0
+    for path, page in pages:
+        # Shards can overlap when results shift between requests; like run_pipeline, keep one copy
+        repeated = dedup.mark_fetched([project.get("full_project_num") for project in page])
+        fetched += len(page) - len(repeated)
+
+        mask = hiring_mask(timing_columns(page))
+        rows = [(index, normalize_project(page[index])) for index, keep in enumerate(mask) if keep and index not in repeated]
+        kept += len(rows)
+        if store and rows:
+            store.upsert(row for _, row in rows)
+
+        entries = []
+        for index, row in rows:
+            # Rows with neither a project number nor a title are their own group
+            order = order_key(path, index)
+            entries.append((dedup_key(row) or order, order, fiscal_year_value(row), spool.tell()))
+            spool.write(json.dumps(row.to_json()).encode("utf-8") + b"\n")
+        dedup.add(entries)
+
+    return fetched, kept
+
+def write_winners(dedup, spool, filename):
+    """Write each project's winning row to CSV and return (rows written, aggregates)"""
+    activity_counts, fiscal_years, total_funding = {}, {}, 0.0
+    written = duplicates = 0
+    chunk = []
+
+    def flush():
+        nonlocal total_funding
+        activities, years, funding = grant_aggregates(chunk)
+        for counts, update in ((activity_counts, activities), (fiscal_years, years)):
+            for key, count in update.items():
+                counts[key] = counts.get(key, 0) + count
+        total_funding += funding
+        chunk.clear()
+
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=GRANT_FIELDS)
+        writer.writeheader()
+        for fy, offset, count in dedup.winners():
+            spool.seek(offset)
+            row = GrantRecord.from_json(json.loads(spool.readline()))
+            writer.writerow(row.to_csv_row(GRANT_FIELDS))
+            written += 1
+
+            if count > 1:
+                duplicates += count - 1
+                report_kept(fy, row)
+
+            chunk.append(row)
+            if len(chunk) >= WRITE_CHUNK:
+                flush()
+        flush()
+
+    print(f"Removed {duplicates} duplicates, kept {written} unique projects")
+    return written, (activity_counts, fiscal_years, total_funding)
+
+def stream_mayo_grants(filename, db=None, max_entries=DEDUP_MEMORY_ENTRIES, max_workers=MAX_WORKERS, failed=None,
+                       state_file=None):
+    """Fetch, filter, dedup and save Mayo grants holding one page at a time
+
+    With state_file, the fetched project numbers are written to it as sync state straight from
+    the dedup tables, unless shard pages failed. Returns statistics for the README.
+    """
+    failed = [] if failed is None else failed
+    payload = mayo_grants_payload()
+    store = GrantStore(db) if db else None
+
+    with tempfile.TemporaryDirectory(prefix="mayo_grants_") as scratch:
+        dedup = ProjectDedup(scratch, max_entries)
+        try:
+            with open(os.path.join(scratch, "rows.jsonl"), "w+b") as spool:
+                fetched, kept = filter_pages(iter_shard_pages(payload, max_workers, failed), spool, dedup, store)
+                print(f"✓ Fetched {fetched} unique projects in total")
+                if not fetched:
+                    print("No projects found")
+                    return {}
+                print(f"\nFilter results: {kept}/{fetched} grants kept ({kept/fetched*100:.1f}%)")
+                if not kept:
+                    print("No projects passed filters")
+                    return {}
+
+                print(f"\nDeduplicating {kept} projects by project number...")
+                written, aggregates = write_winners(dedup, spool, filename)
+                if state_file and not sync_state_blocked(failed):
+                    save_sync_state(dedup.fetched_project_nums(), state_file)
+        finally:
+            dedup.close()
+            if store:
+                store.close()
+
+    print(f"✓ Saved {written} projects to {filename}")
+    if db:
+        print(f"✓ Upserted {kept} records into {db}")
+    return report_statistics(written, *aggregates)
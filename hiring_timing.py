@@ -0,0 +1,174 @@
+"""Batch version of the hiring timing filter and grant aggregates
+
+Dates, fiscal years and costs are parsed once per distinct value into typed columns, and the
+pass/fail mask, timing reasons and counts are computed over whole columns. Results match
+the row-wise is_hiring_relevant / get_timing_reason kept in benchmarks/matching.py exactly. NumPy is
+used for the filter when installed; otherwise the same columns are evaluated in plain Python.
+"""
+from collections import Counter
+from datetime import datetime, time
+from functools import lru_cache
+
+from grant_record import format_value
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MISSING = -1  # empty or absent date string
+INVALID = -2  # present but unparseable, which the row-wise filter treats as an exception
+YEAR_DAYS = 365.25
+MIN_YEARS_REMAINING = 1.5
+MAX_YEARS_SINCE_START = 1.0
+RECENT_FISCAL_YEARS = (2024, 2025)
+
+REASON_RECENT_FY, REASON_REMAINING, REASON_STARTED = 0, 1, 2
+
+@lru_cache(maxsize=65536)
+def parse_day(value):
+    """Proleptic ordinal of a YYYY-MM-DD prefix, or INVALID"""
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').toordinal()
+    except (ValueError, TypeError):
+        return INVALID
+
+def day_ordinal(value):
+    if not value:
+        return MISSING
+    try:
+        return parse_day(value)
+    except TypeError:
+        # Unhashable values cannot be cached and would not parse anyway
+        return INVALID
+
+@lru_cache(maxsize=65536)
+def parse_cost(value):
+    """TOTAL_COST as a float, or None when analyze_results would not count it"""
+    value = value.strip()
+    if not value or not value.replace('.', '').replace(',', '').isdigit():
+        return None
+    try:
+        return float(value.replace(',', ''))
+    except ValueError:
+        return None
+
+def timing_columns(projects, now=None):
+    """Parse start date, end date and fiscal year of every project once"""
+    now = now or datetime.now()
+    end = [day_ordinal(project.get("project_end_date", "")) for project in projects]
+    start = [day_ordinal(project.get("project_start_date", "")) for project in projects]
+    fy_ok = [project.get("fiscal_year", "") in RECENT_FISCAL_YEARS for project in projects]
+    if np is not None:
+        end, start, fy_ok = np.array(end, dtype=np.int64), np.array(start, dtype=np.int64), np.array(fy_ok, dtype=bool)
+
+    return {
+        "end": end,
+        "start": start,
+        "fy_ok": fy_ok,
+        "today": now.date().toordinal(),
+        # (end - now).days floors, so any time past midnight costs the end date a day
+        "end_offset": 0 if now.time() == time(0) else 1,
+    }
+
+def years_remaining(columns):
+    return (columns["end"] - (columns["today"] + columns["end_offset"])) / YEAR_DAYS
+
+def years_since_start(columns):
+    return (columns["today"] - columns["start"]) / YEAR_DAYS
+
+def hiring_mask(columns):
+    """Vectorized is_hiring_relevant: 1.5+ years remaining or started within the last year"""
+    if np is None:
+        return [relevant_one(columns, i) for i in range(len(columns["end"]))]
+
+    end, start, fy_ok = columns["end"], columns["start"], columns["fy_ok"]
+    remaining_ok = (end > 0) & (years_remaining(columns) >= MIN_YEARS_REMAINING)
+    started_ok = np.where(start == INVALID, fy_ok, (start > 0) & (years_since_start(columns) <= MAX_YEARS_SINCE_START))
+    return np.where(end > 0, remaining_ok | started_ok, fy_ok)
+
+def relevant_one(columns, i):
+    end, start = columns["end"][i], columns["start"][i]
+    if end < 0:
+        return columns["fy_ok"][i]
+    if (end - columns["today"] - columns["end_offset"]) / YEAR_DAYS >= MIN_YEARS_REMAINING:
+        return True
+    if start == MISSING:
+        return False
+    if start == INVALID:
+        return columns["fy_ok"][i]
+    return (columns["today"] - start) / YEAR_DAYS <= MAX_YEARS_SINCE_START
+
+def timing_reasons(columns, indices=None):
+    """Vectorized get_timing_reason for the given row indices (all rows by default)"""
+    if indices is None:
+        indices = range(len(columns["end"]))
+    indices = list(indices)
+    if not indices:
+        return []
+
+    if np is None:
+        picked = {key: [columns[key][i] for i in indices] for key in ("end", "start")}
+        picked.update(today=columns["today"], end_offset=columns["end_offset"])
+        remaining = [(end - picked["today"] - picked["end_offset"]) / YEAR_DAYS for end in picked["end"]]
+        since = [(picked["today"] - start) / YEAR_DAYS for start in picked["start"]]
+        codes = [reason_code(end, start, r, s) for end, start, r, s in zip(picked["end"], picked["start"], remaining, since)]
+    else:
+        picked = dict(columns, end=columns["end"][indices], start=columns["start"][indices])
+        remaining, since = years_remaining(picked), years_since_start(picked)
+        end, start = picked["end"], picked["start"]
+        codes = np.select(
+            [(end > 0) & (remaining >= MIN_YEARS_REMAINING),
+             end == INVALID,
+             (start > 0) & (since <= MAX_YEARS_SINCE_START)],
+            [REASON_REMAINING, REASON_RECENT_FY, REASON_STARTED],
+            default=REASON_RECENT_FY,
+        ).tolist()
+        remaining, since = remaining.tolist(), since.tolist()
+
+    return [format_reason(code, r, s) for code, r, s in zip(codes, remaining, since)]
+
+def reason_code(end, start, remaining, since):
+    if end > 0 and remaining >= MIN_YEARS_REMAINING:
+        return REASON_REMAINING
+    if end == INVALID:
+        return REASON_RECENT_FY
+    if start > 0 and since <= MAX_YEARS_SINCE_START:
+        return REASON_STARTED
+    return REASON_RECENT_FY
+
+def format_reason(code, remaining, since):
+    if code == REASON_REMAINING:
+        return f"{remaining:.1f}y remaining"
+    if code == REASON_STARTED:
+        return f"Started {since:.1f}y ago"
+    return "Recent FY"
+
+def count_values(values):
+    """Counts of non-empty values, keyed in order of first appearance"""
+    # Counter tallies in C and keeps insertion order; np.unique on strings would sort objects
+    counts = Counter(values)
+    counts.pop("", None)
+    counts.pop(None, None)
+    return dict(counts)
+
+def total_cost(costs):
+    """Sum of grant record costs that analyze_results counts, as a float"""
+    # Whole-dollar costs are parsed to ints once per record, so they sum exactly without a float list
+    whole, fractional = 0, 0.0
+    for cost in costs:
+        if isinstance(cost, int):
+            whole += cost
+        elif cost:
+            value = parse_cost(cost)
+            if value is not None:
+                fractional += value
+    return float(whole) + fractional
+
+def grant_aggregates(records):
+    """Activity counts, fiscal year counts and total funding for processed grant records"""
+    activities = count_values([record.activity.strip() for record in records])
+    # Tallied on the parsed years so no per-row strings are built
+    years = count_values([record.fiscal_year for record in records])
+    fiscal_years = {format_value(fy): count for fy, count in years.items()}
+    return activities, fiscal_years, total_cost([record.total_cost for record in records])
@@ -0,0 +1,150 @@
+import gzip
+import json
+import os
+from datetime import datetime
+
+from fetch_grants import fetch_sharded
+from abstract_pipeline import ABSTRACT_FIELDS, ORG_FY_ACTIVITY_CODES, project_to_match
+from title_index import TitleIndex, calculate_title_similarity
+from pi_index import PIIndex, calculate_pi_match_score
+
+CORPUS_FILE = "mayo_corpus.json.gz"
+DEFAULT_FISCAL_YEARS = [2022, 2023, 2024, 2025]
+
+def download_mayo_corpus(fiscal_years=None):
+    """Download all Mayo projects with abstracts for the given fiscal years in one bulk pull
+
+    Returns (projects, complete); complete is False when any shard of the pull failed.
+    """
+    fiscal_years = sorted(set(fiscal_years or DEFAULT_FISCAL_YEARS))
+    payload = {
+        "criteria": {
+            "org_names": ["MAYO"],
+            "fiscal_years": fiscal_years,
+            "include_active_projects": True
+        },
+        "include_fields": ABSTRACT_FIELDS,
+        "sort_field": "FiscalYear",
+        "sort_order": "desc"
+    }
+
+    print(f"Downloading Mayo corpus for FY{', FY'.join(str(fy) for fy in fiscal_years)}...")
+    failed = []
+    projects = fetch_sharded(payload, failed=failed)
+    if failed:
+        print(f"✗ Downloaded {len(projects)} Mayo projects, but {len(failed)} shard requests failed")
+    else:
+        print(f"✓ Downloaded {len(projects)} Mayo projects")
+    return projects, not failed
+
+def save_corpus(projects, fiscal_years, filename=CORPUS_FILE):
+    """Save the raw corpus so later runs can match without the network"""
+    corpus = {
+        "downloaded": datetime.now().isoformat(timespec="seconds"),
+        "fiscal_years": sorted(set(fiscal_years)),
+        "projects": projects
+    }
+    with gzip.open(filename, "wt", encoding="utf-8") as f:
+        json.dump(corpus, f)
+    print(f"✓ Saved corpus to {filename}")
+
+def load_corpus(filename=CORPUS_FILE):
+    """Load a previously saved corpus, or None if there is none"""
+    if not os.path.exists(filename):
+        return None
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_or_download_corpus(fiscal_years=None, refresh=False, filename=CORPUS_FILE):
+    """Return a MayoCorpus covering fiscal_years, downloading it only when needed"""
+    fiscal_years = sorted(set(fiscal_years or DEFAULT_FISCAL_YEARS))
+
+    corpus = None if refresh else load_corpus(filename)
+    if corpus and set(fiscal_years) <= set(corpus["fiscal_years"]):
+        print(f"Using local corpus from {corpus['downloaded']} ({len(corpus['projects'])} projects)")
+        return MayoCorpus(corpus["projects"])
+
+    projects, complete = download_mayo_corpus(fiscal_years)
+    # A partial pull would otherwise be reused silently until the next --refresh
+    if complete and projects:
+        save_corpus(projects, fiscal_years, filename)
+    else:
+        print("✗ Not saving an incomplete corpus; the next run will download it again")
+    return MayoCorpus(projects)
+
+class MayoCorpus:
+    """In-memory index of Mayo projects for resolving targets without API calls"""
+
+    def __init__(self, projects):
+        self.matches = []
+        self.titles = TitleIndex()
+        self.by_project_num = {}
+        self.pis = PIIndex()
+        self.by_fiscal_year = {}
+
+        for project in projects:
+            if not project.get("abstract_text"):
+                continue
+
+            index = len(self.matches)
+            match = project_to_match(project, 0.0)
+            self.matches.append(match)
+
+            if match["project_num"]:
+                self.by_project_num[match["project_num"].upper()] = index
+
+            self.titles.add(match["title"])
+
+            self.pis.add(index, match["pi_names"])
+
+            # Mirrors the org + fiscal year + activity code fallback strategy
+            if match["activity"] in ORG_FY_ACTIVITY_CODES:
+                self.by_fiscal_year.setdefault(str(match["fiscal_year"]), []).append(index)
+
+    def __len__(self):
+        return len(self.matches)
+
+    def resolve_project_nums(self, project_nums):
+        """Look up known project numbers directly in the corpus"""
+        resolved = {}
+        for project_num in project_nums:
+            project_num = project_num.strip().upper()
+            if project_num in self.by_project_num:
+                resolved[project_num] = dict(self.matches[self.by_project_num[project_num]], score=1.0)
+        return resolved
+
+    def candidates(self, project_title, pi_name="", fiscal_year=""):
+        """Map candidate project indices to their title similarity with the target"""
+        found = dict(self.titles.search(project_title))
+
+        for index in self.pis.lookup(pi_name):
+            found.setdefault(index, None)
+
+        if fiscal_year:
+            for index in self.by_fiscal_year.get(fiscal_year, []):
+                found.setdefault(index, None)
+
+        return found
+
+    def match(self, project_title, pi_name="", fiscal_year=""):
+        """Resolve a target locally using the same scoring and threshold as the API search"""
+        best_match = None
+        best_score = 0.0
+
+        candidates = self.candidates(project_title, pi_name, fiscal_year)
+        for index in sorted(candidates):
+            match = self.matches[index]
+
+            title_similarity = candidates[index]
+            if title_similarity is None:
+                title_similarity = calculate_title_similarity(project_title, match["title"])
+            pi_match_score = calculate_pi_match_score(pi_name, match["pi_names"])
+            combined_score = (title_similarity * 0.7) + (pi_match_score * 0.3)
+
+            if combined_score > best_score and combined_score > 0.3:
+                best_score = combined_score
+                best_match = dict(match, score=combined_score)
+
+        if best_match:
+            print(f"    Found in local corpus (score: {best_match['score']:.2f})")
+        return best_match
@@ -0,0 +1,91 @@
+"""Normalized PI identities, PI match scoring and a last-name index over PI lists
+
+Case, diacritics, punctuation, suffixes and middle initials are ignored, and "Last, First" equals
+"First Last". A shared last name scores LAST_NAME_SCORE and a shared first or middle name on the
+same person FULL_NAME_SCORE, by hashed lookups rather than substring scans.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Generational and degree suffixes that are not part of a name
+NAME_SUFFIXES = frozenset({"JR", "SR", "II", "III", "IV", "MD", "PHD", "MPH", "DO", "DVM"})
+
+LAST_NAME_SCORE = 0.8
+FULL_NAME_SCORE = 1.0
+
+@lru_cache(maxsize=65536)
+def name_tokens(name):
+    """Upper-case tokens of a name with diacritics, punctuation, hyphens and apostrophes removed"""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).upper()
+    return tuple(re.findall(r"[A-Z0-9]+", text.replace("'", "").replace("-", "")))
+
+@lru_cache(maxsize=65536)
+def normalize_name(name):
+    """Return (last name, given names) for one PI, or None
+
+    Case, diacritics, punctuation and middle initials are ignored, and "Last, First M." gives
+    the same identity as "First M. Last". Given names keep only full names, not initials.
+    """
+    name = name or ""
+    if "," in name:
+        last, _, given = name.partition(",")
+        name = f"{given} {last}"
+
+    tokens = list(name_tokens(name))
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    if not tokens:
+        return None
+    return tokens[-1], frozenset(token for token in tokens[:-1] if len(token) > 1)
+
+@lru_cache(maxsize=65536)
+def parse_pi_string(pi_string):
+    """Identities of every PI in a semicolon-separated string, like extract_pi_names output"""
+    identities = (normalize_name(name) for name in (pi_string or "").split(";"))
+    return tuple(identity for identity in identities if identity)
+
+@lru_cache(maxsize=65536)
+def pi_lookup(pi_string):
+    """Map each last name in a PI string to the given names listed with it"""
+    lookup = {}
+    for last, given in parse_pi_string(pi_string):
+        lookup[last] = lookup.get(last, frozenset()) | given
+    return lookup
+
+def calculate_pi_match_score(pi_name, project_pi_str):
+    """Calculate PI name match score"""
+    if not pi_name or not project_pi_str:
+        return 0.0
+
+    project_pis = pi_lookup(project_pi_str)
+    max_score = 0.0
+    for last, given in parse_pi_string(pi_name):
+        project_given = project_pis.get(last)
+        if project_given is None:
+            continue
+
+        # Last name match is the most reliable; a shared first or middle name confirms it
+        if given & project_given:
+            return FULL_NAME_SCORE
+        max_score = LAST_NAME_SCORE
+    return max_score
+
+class PIIndex:
+    """Hashed index from normalized PI last names to the items that list them"""
+
+    def __init__(self):
+        self.by_last_name = {}
+
+    def add(self, item_id, pi_string):
+        for last in pi_lookup(pi_string):
+            self.by_last_name.setdefault(last, []).append(item_id)
+
+    def lookup(self, pi_string):
+        """Ids of items sharing a last name with any PI in pi_string, in insertion order"""
+        found = {}
+        for last in pi_lookup(pi_string):
+            for item_id in self.by_last_name.get(last, ()):
+                found.setdefault(item_id, None)
+        return list(found)
@@ -0,0 +1,448 @@
+"""Shared NIH RePORTER API access for every script
+
+Responses are cached in .reporter_cache/, keyed by a hash of the endpoint and canonical payload,
+so identical searches are shared within and across scripts. Entries expire per endpoint
+(CACHE_TTLS) and the least recently used ones are evicted past CACHE_MAX_BYTES. --offline serves
+stale entries without touching the network; --no-cache bypasses the cache.
+
+Requests share one pooled keep-alive session and a token-bucket limiter (--rate). 429 and 5xx
+responses are retried with exponential backoff honoring Retry-After, and a 429 halves the rate
+until successful responses bring it back up.
+
+Every raw search response a run uses, from the network or the cache, is appended to a gzipped
+JSONL snapshot in reporter_archive/ named after the script and start time. --replay serves
+every request from a snapshot instead, and replay_output keeps the replayed report apart from
+the live one.
+"""
+import requests
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+# Override with REPORTER_API_BASE to point the scripts at a mirror or a local mock server
+API_BASE = os.environ.get("REPORTER_API_BASE", "https://api.reporter.nih.gov")
+SEARCH_ENDPOINT = "/v2/projects/search"
+
+CACHE_DIR = ".reporter_cache"
+ARCHIVE_DIR = "reporter_archive"
+# Endpoints whose raw responses are appended to the run's archive snapshot
+ARCHIVED_ENDPOINTS = {SEARCH_ENDPOINT}
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 24 * 3600
+
+# Seconds a cached response stays fresh, per endpoint
+CACHE_TTLS = {
+    "/v2/projects/search": 24 * 3600,
+    "/v2/publications/search": 7 * 24 * 3600,
+}
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate"
+}
+
+# NIH asks clients to stay at or below one request per second
+REQUESTS_PER_SECOND = 1.0
+BURST = 3
+POOL_SIZE = 8
+REQUEST_TIMEOUT = 60
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class OfflineCacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode when a request is not in the cache"""
+
+class ResponseCache:
+    """On-disk response cache keyed by a hash of the endpoint and canonical payload"""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttls=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self.lock = threading.Lock()
+        self.size = None
+
+    def key(self, endpoint, payload):
+        """Content hash of a request; key order and whitespace do not matter"""
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{API_BASE}{endpoint}\n{canonical}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, endpoint, payload, ignore_ttl=False):
+        """Return the cached response, or None if missing or expired"""
+        path = self.path(self.key(endpoint, payload))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        ttl = self.ttls.get(endpoint, DEFAULT_TTL)
+        if not ignore_ttl and time.time() - stat.st_mtime > ttl:
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Access time tracks recency for LRU eviction; mtime keeps the write time for TTLs
+        os.utime(path, (time.time(), stat.st_mtime))
+        return data
+
+    def put(self, endpoint, payload, data):
+        """Store a response and evict least recently used entries over the size cap"""
+        path = self.path(self.key(endpoint, payload))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if self.size is None:
+                self.size = sum(size for _, _, size in self.entries())
+            else:
+                self.size += os.path.getsize(path)
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def entries(self):
+        """Yield (path, last access, size) for every cached response"""
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_atime, stat.st_size
+
+    def evict(self):
+        """Remove least recently used entries until the cache is under 90% of its cap"""
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        self.size = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+
+        for path, _, size in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+                self.size -= size
+            except FileNotFoundError:
+                pass
+
+def request_key(endpoint, payload):
+    """Endpoint plus canonical payload, the identity of a request in an archive snapshot"""
+    return endpoint + "\n" + json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+class ResponseArchive:
+    """Append-only, gzip-compressed JSONL log of raw API responses for one run
+
+    Each record is written as its own gzip member, so a snapshot cut short by a crash still
+    reads back up to the last complete record.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.records = 0
+
+    def append(self, endpoint, payload, data, source):
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "api_base": API_BASE,
+            "endpoint": endpoint,
+            "payload": payload,
+            "source": source,
+            "response": data,
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self.lock:
+            if self.records == 0:
+                os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+            with gzip.open(self.filename, "ab") as f:
+                f.write(line)
+            self.records += 1
+
+def read_archive(filename):
+    """Yield the records of an archive snapshot in the order they were written"""
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            print(f"  Archive {filename} ends in a partial record, replaying what was complete")
+
+def latest_snapshot(directory=ARCHIVE_DIR, script=None):
+    """Most recent snapshot in the archive directory, optionally for one script"""
+    script = script or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    try:
+        names = [name for name in os.listdir(directory)
+                 if name.startswith(f"{script}-") and name.endswith(".jsonl.gz")]
+    except FileNotFoundError:
+        names = []
+    if not names:
+        raise FileNotFoundError(f"No {script} snapshots in {directory}/")
+    return os.path.join(directory, max(names))
+
+class SingleFlight:
+    """Coalesce identical concurrent calls so only one of them does the work"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        """Run fn for key, or wait for and share the result of a call already in flight"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {"done": threading.Event()}
+
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call["done"].set()
+
+class TokenBucket:
+    """Token bucket rate limiter that slows down on 429s and recovers on success"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def configure(self, rate, burst=None):
+        with self.lock:
+            self.max_rate = self.rate = rate
+            if burst is not None:
+                self.burst = burst
+            self.tokens = min(self.tokens, self.burst)
+
+    def acquire(self):
+        """Take a token, sleeping only when the bucket is empty"""
+        if self.max_rate <= 0:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token now so concurrent callers queue up behind each other
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def slow_down(self):
+        """Halve the rate after the server pushes back"""
+        with self.lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def speed_up(self):
+        """Step the rate back toward its configured maximum after a success"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+def create_session(pool_size=POOL_SIZE):
+    """Session with a pooled keep-alive connection per worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying, honoring Retry-After when the server sends it"""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(BACKOFF_MAX, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+session = create_session()
+rate_limiter = TokenBucket()
+cache = ResponseCache()
+in_flight = SingleFlight()
+cache_mode = {"enabled": True, "refresh": False, "offline": False}
+archive = None
+replay = None
+
+def configure_cache(enabled=True, refresh=False, offline=False, directory=None):
+    """Set how API calls use the response cache for this run"""
+    global cache
+    if directory:
+        cache = ResponseCache(directory)
+    cache_mode.update(enabled=enabled, refresh=refresh, offline=offline)
+
+def configure_archive(enabled=True, directory=ARCHIVE_DIR):
+    """Start a new archive snapshot for this run, named after the script and start time"""
+    global archive
+    if not enabled:
+        archive = None
+        return
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0] or "reporter"
+    archive = ResponseArchive(os.path.join(directory, f"{script}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz"))
+
+def configure_replay(snapshot):
+    """Serve every archived request from a snapshot instead of the cache or network"""
+    global replay
+    if snapshot == "latest":
+        snapshot = latest_snapshot()
+    responses = {}
+    for record in read_archive(snapshot):
+        responses[request_key(record["endpoint"], record["payload"])] = record["response"]
+    replay = {"snapshot": snapshot, "responses": responses}
+    print(f"Replaying {len(responses)} archived responses from {snapshot}")
+    return snapshot
+
+def replay_output(filename):
+    """Separate output for a replayed run: mayo_grants.csv -> mayo_grants.replay-20250601-020000.csv"""
+    if replay is None:
+        return filename
+    name = os.path.basename(replay["snapshot"])
+    name = name[:-len(".jsonl.gz")] if name.endswith(".jsonl.gz") else name
+    base, extension = os.path.splitext(filename)
+    return f"{base}.replay-{name.split('-', 1)[-1]}{extension}"
+
+def configure_rate_limit(requests_per_second, burst=None):
+    """Set the shared request rate for every API call in this process"""
+    rate_limiter.configure(requests_per_second, burst)
+
+def add_api_arguments(parser):
+    """Add the shared API and cache switches to a script's argument parser"""
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help=f"Maximum API requests per second (default: {REQUESTS_PER_SECOND})")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--refresh", action="store_true",
+                       help="Ignore cached API responses and fetch fresh data")
+    group.add_argument("--offline", action="store_true",
+                       help="Serve API responses from the cache only, never the network")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Neither read nor write the response cache")
+    parser.add_argument("--no-archive", action="store_true",
+                        help=f"Do not append raw search responses to a snapshot in {ARCHIVE_DIR}/")
+    group.add_argument("--replay", metavar="SNAPSHOT",
+                       help="Serve API responses from an archive snapshot (or 'latest') instead of the network")
+
+def configure_api_from_args(args):
+    """Apply the switches added by add_api_arguments"""
+    configure_rate_limit(args.rate)
+    configure_cache(enabled=not args.no_cache, refresh=args.refresh, offline=args.offline)
+    if args.replay:
+        configure_replay(args.replay)
+    # A replay reads an existing snapshot, so it does not start a new one
+    configure_archive(enabled=not (args.no_archive or args.replay))
+
+def post_json(endpoint, payload):
+    """POST a JSON payload to the RePORTER API, using the response cache when enabled"""
+    # Identical payloads issued concurrently share a single request
+    key = cache.key(endpoint, payload)
+    return in_flight.do(key, lambda: fetch_json(endpoint, payload))
+
+def fetch_json(endpoint, payload):
+    """Serve a request from a replayed snapshot, the cache or the network"""
+    if replay is not None:
+        data = replay["responses"].get(request_key(endpoint, payload))
+        if data is None:
+            raise OfflineCacheMiss(f"No archived response for {endpoint} in {replay['snapshot']}")
+        return data
+
+    use_cache = cache_mode["enabled"]
+
+    if use_cache and not cache_mode["refresh"]:
+        data = cache.get(endpoint, payload, ignore_ttl=cache_mode["offline"])
+        if data is not None:
+            archive_response(endpoint, payload, data, "cache")
+            return data
+
+    if cache_mode["offline"]:
+        raise OfflineCacheMiss(f"No cached response for {endpoint} (offline mode)")
+
+    data = send_request(endpoint, payload)
+
+    if use_cache:
+        cache.put(endpoint, payload, data)
+    archive_response(endpoint, payload, data, "network")
+    return data
+
+def archive_response(endpoint, payload, data, source):
+    if archive is not None and endpoint in ARCHIVED_ENDPOINTS:
+        archive.append(endpoint, payload, data, source)
+
+def send_request(endpoint, payload):
+    """POST to the API under the shared rate limit, retrying 429s, 5xx and dropped connections"""
+    body = json.dumps(payload)
+
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.acquire()
+        response = None
+        try:
+            response = session.post(API_BASE + endpoint, data=body, timeout=REQUEST_TIMEOUT)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                rate_limiter.speed_up()
+                return response.json()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+
+        if attempt == MAX_RETRIES:
+            response.raise_for_status()
+
+        if response is not None and response.status_code == 429:
+            rate_limiter.slow_down()
+
+        delay = retry_delay(response, attempt)
+        status = response.status_code if response is not None else "connection error"
+        print(f"    API returned {status}, retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})")
+        time.sleep(delay)
+
+def search_projects(payload):
+    """Run a /v2/projects/search query"""
+    return post_json(SEARCH_ENDPOINT, payload)
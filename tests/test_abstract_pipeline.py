@@ -0,0 +1,28 @@
+from abstract_pipeline import PIBatchPlanner, parse_pi_names, project_has_pi
+
+def project(*pis):
+    return {"principal_investigators": [{"first_name": first, "last_name": last} for first, last in pis]}
+
+# PI strings as extract_pi_names wrote them into opportunities.csv, with the API records behind them
+REAL_PIS = [
+    ("K Sreekumaran Nair", ("K Sreekumaran", "Nair")),
+    ("JENNIFER ST SAUVER", ("JENNIFER", "ST SAUVER")),
+    ("MARK MC NIVEN", ("MARK", "MC NIVEN")),
+]
+
+def test_project_has_pi_matches_multi_token_names():
+    for pi_string, (first, last) in REAL_PIS:
+        assert project_has_pi(project((first, last)), parse_pi_names(pi_string)), pi_string
+
+def test_project_has_pi_rejects_other_people():
+    assert not project_has_pi(project(("John", "Nair")), parse_pi_names("K Sreekumaran Nair"))
+    assert not project_has_pi(project(("Jennifer", "Sauvé")), parse_pi_names("Mark Mc Niven"))
+
+def test_batched_candidates_keep_multi_token_names():
+    planner = PIBatchPlanner((pi_string, "2024") for pi_string, _ in REAL_PIS)
+    projects = [project(pi) for _, pi in REAL_PIS] + [project(("John", "Smith"))]
+    for batch in planner.batches:
+        batch[2] = projects  # already fetched
+
+    for (pi_string, _), expected in zip(REAL_PIS, projects):
+        assert planner.candidates(pi_string, "2024") == [expected]
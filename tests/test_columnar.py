@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from columnar import read_rows, read_table, write_parquet
+
+FIELDS = ["PROJECT_TITLE", "FY", "PROJECT_START", "TOTAL_COST"]
+
+def test_unparseable_cells_keep_their_column_as_text(tmp_path, capsys):
+    # A shifted row from opportunities.csv: a date in TOTAL_COST and a number in PROJECT_START
+    rows = [
+        {"PROJECT_TITLE": "Imaging", "FY": "2025", "PROJECT_START": "2024-05-01T00:00:00", "TOTAL_COST": "723711"},
+        {"PROJECT_TITLE": "Shifted", "FY": "2025", "PROJECT_START": "25", "TOTAL_COST": "2028-05-31T00:00:00"},
+    ]
+    filename = write_parquet(rows, FIELDS, str(tmp_path / "rows.csv"))
+
+    assert "TOTAL_COST: 1 value(s)" in capsys.readouterr().out
+    schema = read_table(filename).schema
+    assert str(schema.field("FY").type) == "int32"
+    assert str(schema.field("TOTAL_COST").type) == "string"
+    assert read_rows(filename) == rows
@@ -0,0 +1,52 @@
+import csv
+import os
+
+from grant_store import GrantStore, core_project_num, import_csvs, normalized_title
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = [os.path.join(REPO, name) for name in ("mayo_grants.csv", "opportunities.csv")]
+
+def numbered_titles(filename):
+    with open(filename, "r", encoding="utf-8") as f:
+        return {normalized_title(row["PROJECT_TITLE"]) for row in csv.DictReader(f)
+                if core_project_num(row["FULL_PROJECT_NUM"])}
+
+def stored_titles(store, where=""):
+    rows = store.connection.execute(f"SELECT project_title FROM grants {where}").fetchall()
+    return [normalized_title(row["project_title"]) for row in rows]
+
+def test_import_keeps_one_row_per_grant(tmp_path):
+    with GrantStore(str(tmp_path / "grants.db")) as store:
+        import_csvs(store, SOURCES)
+        titles = stored_titles(store)
+        by_title = stored_titles(store, "WHERE core_project_num LIKE 'title:%'")
+
+    assert len(titles) == len(set(titles))
+    # Grants that opportunities.csv numbers must not also stay keyed by their title
+    assert not set(by_title) & numbered_titles(SOURCES[1])
+
+def test_title_row_merges_into_numbered_row_in_either_order(tmp_path):
+    titled = {"PROJECT_TITLE": "Reliable Seizure Prediction", "FY": "2025", "TOTAL_COST": "100"}
+    numbered = dict(titled, FULL_PROJECT_NUM="5R01NS127572-04", ABSTRACT="Seizures.")
+    for order in ([titled, numbered], [numbered, titled]):
+        with GrantStore(str(tmp_path / f"{len(order[0])}.db")) as store:
+            for row in order:
+                store.upsert([row])
+            rows = store.connection.execute("SELECT * FROM grants").fetchall()
+
+        assert len(rows) == 1
+        assert rows[0]["core_project_num"] == "R01NS127572"
+        assert rows[0]["abstract"] == "Seizures."
+
+def test_title_row_finds_a_retitled_project_in_a_later_call(tmp_path):
+    first = {"PROJECT_TITLE": "Epidemiology of Lupus", "FY": "2023", "FULL_PROJECT_NUM": "5U01DP006597-02"}
+    renamed = dict(first, PROJECT_TITLE="DP22-002 Epidemiology of Lupus", FY="2024", FULL_PROJECT_NUM="5U01DP006597-03")
+    with GrantStore(str(tmp_path / "grants.db")) as store:
+        store.upsert([first])
+        store.upsert([renamed])
+        store.upsert([{"PROJECT_TITLE": "Epidemiology of Lupus", "FY": "2023", "ABSTRACT": "Lupus cohorts."}])
+        rows = store.connection.execute("SELECT * FROM grants").fetchall()
+
+    assert len(rows) == 1
+    assert rows[0]["project_title"] == "DP22-002 Epidemiology of Lupus"
+    assert rows[0]["abstract"] == "Lupus cohorts."
@@ -0,0 +1,20 @@
+from title_index import TitleIndex, calculate_title_similarity
+
+def test_short_close_title_survives_top_k():
+    # Long titles share more raw words with the query but score lower than the short one
+    query = "cardiac imaging biomarkers predict heart failure outcomes elderly"
+    filler = "genomic proteomic metabolomic signatures across multiethnic population cohorts followed longitudinally"
+    titles = [f"heart failure outcomes elderly {filler} {i}" for i in range(5)]
+    titles.append("cardiac imaging biomarkers")
+    index = TitleIndex(titles)
+
+    best_id, best_score = index.search(query, k=2)[0]
+    assert best_id == len(titles) - 1
+    assert best_score == calculate_title_similarity(query, titles[-1])
+
+def test_scores_match_calculate_title_similarity():
+    titles = ["Genomics of Aging", "the", "Aging and the Brain", "Brain Aging in Mice Using Imaging Methods"]
+    index = TitleIndex(titles)
+    for query in ["aging brain", "The", "brain aging in mice using imaging", "genomics of aging"]:
+        for title_id, score in index.search(query):
+            assert score == calculate_title_similarity(query, titles[title_id])